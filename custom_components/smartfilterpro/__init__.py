@@ -1,39 +1,101 @@
 # custom_components/smartfilterpro/__init__.py
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from datetime import datetime, timezone
-from typing import Optional
-
-from homeassistant.core import HomeAssistant, callback
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+import aiohttp
+from yarl import URL
+from homeassistant.core import HomeAssistant, ServiceCall, callback
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.const import STATE_UNKNOWN, STATE_UNAVAILABLE
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, STATE_UNKNOWN, STATE_UNAVAILABLE
 from homeassistant.helpers import entity_registry as er, device_registry as dr
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.json import json_bytes
 from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     PLATFORMS,
     STORAGE_KEY,
     CORE_INGEST_URL,
+    CORE_HTTP_LIMIT, CORE_HTTP_LIMIT_PER_HOST,
+    CORE_HTTP_KEEPALIVE_SECONDS, CORE_HTTP_DNS_CACHE_SECONDS, CORE_TIMEOUT,
+    TELEMETRY_DEBOUNCE_SECONDS, CORE_TOKEN_SKEW_SECONDS, POST_ERROR_LOG_INTERVAL,
+    TOKEN_SKEW_SECONDS, TOKEN_KEYS,
+    RUNTIME_SAVE_DELAY, TELEMETRY_MIN_INTERVAL_SECONDS, STATE_COALESCE_SECONDS,
+    TELEMETRY_MAX_BATCH, TELEMETRY_MAX_PENDING, CORE_TOKEN_REFRESH_LEAD_SECONDS,
+    TELEMETRY_RETRY_MAX, TELEMETRY_RETRY_ATTEMPTS, TELEMETRY_RETRY_INTERVAL_SECONDS,
     # ids
     CONF_USER_ID, CONF_HVAC_ID, CONF_CLIMATE_ENTITY_ID,
     # posting
     CONF_API_BASE, CONF_POST_PATH,
-    # tokens
-    CONF_ACCESS_TOKEN,
 )
-from .auth import SfpAuth
+from .auth import async_get_auth
 
 _LOGGER = logging.getLogger(__name__)
 
 # Consider these hvac_action values to be "active"
-ACTIVE_ACTIONS = {"heating", "cooling", "fan"}
+ACTIVE_ACTIONS = frozenset({"heating", "cooling", "fan"})
 
 # Fan modes that indicate air is moving even if hvac_action is "idle"
-FAN_ACTIVE_MODES = {"on", "on_high", "circulate"}
+FAN_ACTIVE_MODES = frozenset({"on", "on_high", "circulate"})
+
+# 8-state equipment status -> (is_cooling, is_heating, is_fan_only) (matching Hubitat)
+STATUS_FLAGS: dict[str, tuple[bool, bool, bool]] = {
+    "Cooling_Fan": (True, False, False),
+    "Cooling": (True, False, False),
+    "Heating_Fan": (False, True, False),
+    "Heating": (False, True, False),
+    "AuxHeat_Fan": (False, True, False),
+    "AuxHeat": (False, True, False),
+    "Fan_only": (False, False, True),
+    "Idle": (False, False, False),
+}
+
+# Attributes that feed the Core payload or cycle detection; a state change
+# that touches none of these (and keeps the same state) is not worth posting.
+# Also the steady-state ping signature, so keep it in step with _build_payload
+# and _classify_8_state.
+TRACKED_ATTRS = (
+    "hvac_action",
+    "hvac_mode",
+    "fan_mode",
+    "preset_mode",
+    "current_temperature",
+    "current_humidity",
+    "humidity",
+    "temperature",
+    "target_temp_low",
+    "target_temp_high",
+)
+
+# Headers shared by every Core ingest POST; only Authorization varies
+CORE_BASE_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
+# _post_to_core outcomes. Only a rejection (Core answered and refused the
+# request) is worth splitting a batch over; anything not delivered would
+# fail the same way per event.
+POST_OK = "ok"
+POST_REJECTED = "rejected"        # 4xx other than 401/429
+POST_UNDELIVERED = "undelivered"  # no token, timeout, connection error, 5xx, 429
+
+# Climate states that mean the device isn't reporting
+UNAVAILABLE_STATES = frozenset({STATE_UNKNOWN, STATE_UNAVAILABLE, "unavailable", "unknown"})
 
 ENTRY_VERSION = 2
 
@@ -53,11 +115,22 @@ class RuntimeTracker:
             "is_active": False,            # last computed active boolean
             "last_active_mode": None,      # 'heating' | 'cooling' | 'fanonly' | None
             "last_equipment_status": "Idle",  # 8-state system status
-            "last_post_time": None,        # datetime of last post (for debounce)
+            "last_post_time": None,        # time.monotonic() of last post (for debounce)
             "last_post_status": None,      # equipment status of last post
             "sequence_number": 0,          # monotonic event sequence counter
             "last_is_reachable": None,     # bool | None — tracks connectivity transitions
+            "last_sent_snapshot": None,    # [state, hvac_action, fan_mode] of last post
+            "last_signature": None,        # reported values of last post (not persisted)
         }
+        # Events Core hasn't accepted yet, oldest first; persisted so a reload
+        # or restart re-sends them instead of losing them
+        self.retry_queue: list[dict] = []
+        # What the Store last wrote (or loaded), so unload can skip a no-op write
+        self._last_saved: Optional[dict] = None
+        # True while an async_delay_save is scheduled but hasn't written yet
+        self._save_pending = False
+        # Set by async_shutdown; a reloaded entry owns the Store file from then on
+        self._closed = False
     
     async def load_state(self):
         """Load persisted state, with validation for recent active cycles."""
@@ -68,7 +141,7 @@ class RuntimeTracker:
             if "active_since_iso" in data:
                 try:
                     stored_time = datetime.fromisoformat(data["active_since_iso"])
-                    time_diff = (datetime.now(timezone.utc) - stored_time).total_seconds()
+                    time_diff = (dt_util.utcnow() - stored_time).total_seconds()
                     if 0 <= time_diff < 3600:  # Within last hour
                         self.run_state["active_since"] = stored_time
                         _LOGGER.debug("SFP: Restored active cycle from %s (%.1f min ago)", 
@@ -87,27 +160,67 @@ class RuntimeTracker:
                 "last_equipment_status": data.get("last_equipment_status", "Idle"),
                 "sequence_number": int(data.get("sequence_number", 0)),
                 "last_is_reachable": data.get("last_is_reachable"),
+                "last_sent_snapshot": data.get("last_sent_snapshot"),
             })
-            
+            self.retry_queue[:] = [
+                e for e in data.get("retry_queue") or ()
+                if isinstance(e, dict) and "sequence_number" in e
+            ]
+            self._last_saved = self._snapshot()
+
         except Exception as e:
             _LOGGER.warning("SFP: Failed to load runtime state: %s", e)
     
-    async def save_state(self):
-        """Persist current runtime state."""
-        try:
-            data = {
-                "last_action": self.run_state.get("last_action"),
-                "is_active": self.run_state.get("is_active", False),
-                "last_active_mode": self.run_state.get("last_active_mode"),
-                "last_equipment_status": self.run_state.get("last_equipment_status", "Idle"),
-                "sequence_number": self.run_state.get("sequence_number", 0),
-                "last_is_reachable": self.run_state.get("last_is_reachable"),
-            }
+    def _snapshot(self) -> dict:
+        """Serializable snapshot of run_state for the Store."""
+        data = {
+            "last_action": self.run_state.get("last_action"),
+            "is_active": self.run_state.get("is_active", False),
+            "last_active_mode": self.run_state.get("last_active_mode"),
+            "last_equipment_status": self.run_state.get("last_equipment_status", "Idle"),
+            "sequence_number": self.run_state.get("sequence_number", 0),
+            "last_is_reachable": self.run_state.get("last_is_reachable"),
+            "last_sent_snapshot": self.run_state.get("last_sent_snapshot"),
+            "retry_queue": list(self.retry_queue),
+        }
+
+        if self.run_state.get("active_since"):
+            data["active_since_iso"] = self.run_state["active_since"].isoformat()
+
+        return data
 
-            if self.run_state.get("active_since"):
-                data["active_since_iso"] = self.run_state["active_since"].isoformat()
+    def _data_to_save(self) -> dict:
+        """Data callback for the delayed Store write; remembers what was written."""
+        self._save_pending = False
+        self._last_saved = self._snapshot()
+        return self._last_saved
 
+    def save_state(self):
+        """Schedule a persist of the current runtime state.
+
+        Writes are debounced by the Store, so a burst of state changes costs
+        one serialization and one disk write. No-op after async_shutdown.
+        """
+        if self._closed:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, RUNTIME_SAVE_DELAY)
+
+    async def async_shutdown(self):
+        """Persist immediately (unload path), superseding any pending delayed save.
+
+        Skipped when run_state already matches what is on disk and no delayed
+        save is outstanding; one left scheduled would fire from this Store
+        after a reload and could overwrite the new tracker's data.
+        """
+        self._closed = True
+        data = self._snapshot()
+        if data == self._last_saved and not self._save_pending:
+            return
+        try:
             await self._store.async_save(data)
+            self._save_pending = False
+            self._last_saved = data
         except Exception as e:
             _LOGGER.warning("SFP: Failed to save runtime state: %s", e)
 
@@ -117,13 +230,12 @@ class RuntimeTracker:
         if event_type == "Mode_Change":
             return False
 
-        now = datetime.now(timezone.utc)
         last_time = self.run_state.get("last_post_time")
         last_status = self.run_state.get("last_post_status")
 
         # Skip if same status posted within last 3 seconds
-        if last_time and last_status == equipment_status:
-            elapsed = (now - last_time).total_seconds()
+        if last_time is not None and last_status == equipment_status:
+            elapsed = time.monotonic() - last_time
             if elapsed < 3.0:
                 _LOGGER.debug(
                     "SFP: Skipping duplicate %s post (same status %s, %.1fs ago)",
@@ -135,7 +247,7 @@ class RuntimeTracker:
 
     def record_post(self, equipment_status: str):
         """Record that a post was made (for debounce tracking)."""
-        self.run_state["last_post_time"] = datetime.now(timezone.utc)
+        self.run_state["last_post_time"] = time.monotonic()
         self.run_state["last_post_status"] = equipment_status
 
     def get_and_increment_sequence(self) -> int:
@@ -145,6 +257,22 @@ class RuntimeTracker:
         return seq
 
 
+@dataclass(slots=True)
+class TelemetryState:
+    """Per-entry telemetry handles, kept under hass.data[DOMAIN][entry_id][STORAGE_KEY]."""
+
+    runtime_tracker: RuntimeTracker
+    session: aiohttp.ClientSession
+    flush: Callable[[], Awaitable[None]]
+    send_now: Callable[[], Awaitable[None]]
+    cancel_pending_state: Callable[[], None]
+    cancel_token_refresh: Callable[[], None]
+    unsub_retry: Callable[[], None]
+    drain_state: Callable[[], Awaitable[None]]
+    unsub_telemetry: Optional[Callable[[], None]] = None
+    prime_task: Optional[asyncio.Task] = None
+
+
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if entry.version is None:
         entry.version = 1
@@ -156,14 +284,52 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return dt_util.utcnow().isoformat()
+
+
+def _create_core_session() -> aiohttp.ClientSession:
+    """Dedicated session for Core ingest so telemetry posts reuse keep-alive connections."""
+    connector = aiohttp.TCPConnector(
+        limit=CORE_HTTP_LIMIT,
+        limit_per_host=CORE_HTTP_LIMIT_PER_HOST,
+        keepalive_timeout=CORE_HTTP_KEEPALIVE_SECONDS,
+        ttl_dns_cache=CORE_HTTP_DNS_CACHE_SECONDS,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=CORE_TIMEOUT,
+    )
 
 
 def _is_climate_available(state) -> bool:
     """Check if climate entity is properly available."""
     if not state:
         return False
-    return state.state not in {STATE_UNKNOWN, STATE_UNAVAILABLE, "unavailable", "unknown"}
+    return state.state not in UNAVAILABLE_STATES
+
+
+def _state_changed_materially(old_state, new_state) -> bool:
+    """True if the hvac mode or any tracked attribute differs between states."""
+    if old_state is None or new_state is None:
+        return True
+    if old_state.state != new_state.state:
+        return True
+    old_attrs = old_state.attributes or {}
+    new_attrs = new_state.attributes or {}
+    return any(old_attrs.get(k) != new_attrs.get(k) for k in TRACKED_ATTRS)
+
+
+def _state_snapshot(state) -> list:
+    """Fields compared across reloads to decide whether the prime post is needed."""
+    attrs = state.attributes or {}
+    return [state.state, attrs.get("hvac_action"), attrs.get("fan_mode")]
+
+
+def _payload_signature(state, humidity_fallback) -> tuple:
+    """Everything a steady-state ping reports; equal signatures mean an identical ping."""
+    attrs = state.attributes or {}
+    return (state.state, humidity_fallback, *(attrs.get(k) for k in TRACKED_ATTRS))
 
 
 def _attrs_is_active(attrs: dict) -> bool:
@@ -174,22 +340,20 @@ def _attrs_is_active(attrs: dict) -> bool:
     """
     if not attrs:
         return False
-    
+
     hvac_action = attrs.get("hvac_action")
-    
+
     # Primary check: explicit active actions
     if hvac_action in ACTIVE_ACTIONS:
         return True
-    
+
     # Secondary check: only for idle state with active fan
-    if hvac_action == "idle":
-        fan_mode = attrs.get("fan_mode")
-        if isinstance(fan_mode, str):
-            fm = fan_mode.strip().lower()
-            return fm in FAN_ACTIVE_MODES
-    
-    # All other cases (including None, "off", etc.) are inactive
-    return False
+    if hvac_action != "idle":
+        # All other cases (including None, "off", etc.) are inactive
+        return False
+
+    fan_mode = attrs.get("fan_mode")
+    return isinstance(fan_mode, str) and fan_mode.strip().lower() in FAN_ACTIVE_MODES
 
 
 def _classify_mode(attrs: dict) -> str:
@@ -231,14 +395,31 @@ def _classify_8_state(attrs: dict, hvac_mode: str = None) -> str:
     if not attrs:
         return "Idle"
 
-    hvac_action = (attrs.get("hvac_action") or "idle").lower()
-    fan_mode = (attrs.get("fan_mode") or "auto").lower()
-    preset_mode = (attrs.get("preset_mode") or "").lower()
-    hvac_mode_attr = (attrs.get("hvac_mode") or hvac_mode or "").lower()
+    # Called for every state change (and again per payload); the inputs have
+    # only a handful of distinct combinations, so memoize on the raw values.
+    return _classify_8_state_cached(
+        attrs.get("hvac_action"),
+        attrs.get("fan_mode"),
+        attrs.get("preset_mode"),
+        attrs.get("hvac_mode") or hvac_mode,
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _classify_8_state_cached(
+    hvac_action: Optional[str],
+    fan_mode: Optional[str],
+    preset_mode: Optional[str],
+    hvac_mode_attr: Optional[str],
+) -> str:
+    hvac_action = (hvac_action or "idle").lower()
+    fan_mode = (fan_mode or "auto").lower()
+    preset_mode = (preset_mode or "").lower()
+    hvac_mode_attr = (hvac_mode_attr or "").lower()
 
     cooling_active = hvac_action == "cooling"
     heating_active = hvac_action == "heating"
-    fan_explicitly_on = fan_mode in ("on", "on_high", "circulate")
+    fan_explicitly_on = fan_mode in FAN_ACTIVE_MODES
     fan_only_mode = hvac_action == "fan"
 
     # Check for auxiliary/emergency heat
@@ -246,8 +427,7 @@ def _classify_8_state(attrs: dict, hvac_mode: str = None) -> str:
     is_aux_heat = (
         "emergency" in preset_mode or
         "aux" in preset_mode or
-        "emergency" in hvac_mode_attr or
-        hvac_mode_attr == "heat_cool" and "aux" in hvac_action
+        "emergency" in hvac_mode_attr
     )
 
     if is_aux_heat and heating_active and fan_explicitly_on:
@@ -362,25 +542,41 @@ def _read_humidity_from_entity(hass: HomeAssistant, entity_id: Optional[str]) ->
         return None
 
 
-async def _ensure_valid_token(hass: HomeAssistant, entry: ConfigEntry) -> Optional[str]:
-    """Centralized check via SfpAuth; returns latest access token."""
-    auth = SfpAuth(hass, entry)
-    await auth.ensure_valid()
-    # fetch most recent token from config entry
-    updated = hass.config_entries.async_get_entry(entry.entry_id)
-    token = (updated.data if updated else entry.data).get(CONF_ACCESS_TOKEN)
-    if token:
-        _LOGGER.debug("SFP using access token (len=%s).", len(str(token)))
-    else:
-        _LOGGER.warning("SFP no access token available; requests will be unauthenticated.")
-    return token
+def _build_static_payload(
+    user_id: str,
+    hvac_id: str,
+    entity_id: str,
+    *,
+    thermostat_manufacturer: Optional[str] = None,
+    thermostat_model: Optional[str] = None,
+) -> dict:
+    """Fields that never change for a config entry; built once at setup."""
+    return {
+        # Device identification
+        "device_id": hvac_id,
+        "workspace_id": user_id,
+        "user_id": user_id,
+        "manufacturer": thermostat_manufacturer or "Home Assistant",
+        "model": thermostat_model or "Unknown Model",
+        "model_number": entity_id,
+        "device_type": "thermostat",
+        "source": "home_assistant",
+        "source_vendor": "home_assistant",
+        "connection_source": "home_assistant",
+        "frontend_id": hvac_id,
+        "firmware_version": None,
+        "serial_number": None,
+        "timezone": "UTC",
+
+        # HA-specific fields (for compatibility)
+        "ha_entity_id": entity_id,
+    }
 
 
 def _build_payload(
     state,
-    user_id: str,
-    hvac_id: str,
-    entity_id: str,
+    static_payload: dict,
+    now_iso: str,
     *,
     hvac_mode: Optional[str] = None,
     runtime_seconds: Optional[int] = None,
@@ -388,8 +584,6 @@ def _build_payload(
     cycle_end: Optional[str] = None,
     connected: bool = False,
     device_name: Optional[str] = None,
-    thermostat_manufacturer: Optional[str] = None,
-    thermostat_model: Optional[str] = None,
     last_mode: Optional[str] = None,
     is_reachable: Optional[bool] = None,
     event_type: Optional[str] = None,
@@ -400,34 +594,38 @@ def _build_payload(
     """
     Payload shape expected by Railway Core (matches Hubitat 8-state format).
     Posts directly to core-ingest-ingest.up.railway.app
+
+    Only the per-event fields are computed here; device identification comes
+    from `static_payload` (see _build_static_payload).
     """
     attrs = state.attributes if state else {}
-    ts = _now_iso()
 
     # Get 8-state equipment status
     equipment_status = _classify_8_state(attrs, hvac_mode)
     is_active = equipment_status != "Idle"
 
     # Map 8-state to boolean flags (matching Hubitat)
-    is_cooling = equipment_status in ("Cooling_Fan", "Cooling")
-    is_heating = equipment_status in ("Heating_Fan", "Heating", "AuxHeat_Fan", "AuxHeat")
-    is_fan_only = equipment_status == "Fan_only"
+    is_cooling, is_heating, is_fan_only = STATUS_FLAGS.get(
+        equipment_status, (False, False, False)
+    )
 
     # Thermostat mode from HA
     thermostat_mode = hvac_mode
 
-    # Temperature values
-    current_temp = attrs.get("current_temperature")
+    # Temperature values (bind .get once for the lookups below)
+    get = attrs.get
+    current_temp = get("current_temperature")
     # Prefer the climate entity's own humidity attribute; many thermostats
     # (ecobee, Honeywell, Sensibo, etc.) don't expose humidity on the climate
     # entity, so fall back to a humidity sensor discovered on the same device.
-    humidity = attrs.get("current_humidity")
+    humidity = get("current_humidity")
     if humidity is None:
-        humidity = attrs.get("humidity")
+        humidity = get("humidity")
     if humidity is None:
         humidity = humidity_fallback
-    heat_setpoint = attrs.get("target_temp_low") or attrs.get("temperature")
-    cool_setpoint = attrs.get("target_temp_high") or attrs.get("temperature")
+    target = get("temperature")
+    heat_setpoint = get("target_temp_low") or target
+    cool_setpoint = get("target_temp_high") or target
 
     # Determine event type
     if event_type is None:
@@ -436,23 +634,11 @@ def _build_payload(
         else:
             event_type = "Telemetry_Update"
 
+    # Single merge into a fresh dict: the static template is shared across
+    # events and must not be mutated
     return {
-        # Device identification
-        "device_id": hvac_id,
-        "workspace_id": user_id,
-        "user_id": user_id,
-        "device_name": device_name or entity_id,
-        "manufacturer": thermostat_manufacturer or "Home Assistant",
-        "model": thermostat_model or "Unknown Model",
-        "model_number": entity_id,
-        "device_type": "thermostat",
-        "source": "home_assistant",
-        "source_vendor": "home_assistant",
-        "connection_source": "home_assistant",
-        "frontend_id": hvac_id,
-        "firmware_version": None,
-        "serial_number": None,
-        "timezone": "UTC",
+        **static_payload,
+        "device_name": device_name or static_payload["ha_entity_id"],
 
         # 8-state equipment status fields (matching Hubitat)
         "last_mode": thermostat_mode,
@@ -482,22 +668,29 @@ def _build_payload(
         "previous_status": previous_status,
 
         # Timestamps
-        "timestamp": ts,
-        "recorded_at": ts,
-        "observed_at": ts,
+        "timestamp": now_iso,
+        "recorded_at": now_iso,
+        "observed_at": now_iso,
 
-        # HA-specific fields (for compatibility)
-        "ha_entity_id": entity_id,
         "cycle_start_ts": cycle_start,
         "cycle_end_ts": cycle_end,
-        "fan_mode": attrs.get("fan_mode"),
-
-        # Raw attributes for debugging
-        "payload_raw": dict(attrs),
+        "fan_mode": get("fan_mode"),
     }
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
+    # Registered once for the integration; each entry publishes its own
+    # send_now coroutine in its bucket and the service dispatches to them.
+    async def _svc_send_now(call: ServiceCall) -> None:
+        entry_id = call.data.get("entry_id")
+        for eid, bucket in list(hass.data.get(DOMAIN, {}).items()):
+            if entry_id not in (None, eid):
+                continue
+            telemetry = bucket.get(STORAGE_KEY)
+            if telemetry:
+                await telemetry.send_now()
+
+    hass.services.async_register(DOMAIN, "send_now", _svc_send_now)
     return True
 
 
@@ -514,8 +707,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         return True
 
     # Post telemetry directly to Railway Core (like Hubitat does)
-    core_ingest_url = CORE_INGEST_URL
-    session = async_get_clientsession(hass)
+    # Parsed once; aiohttp would otherwise build a URL from the string per request
+    core_ingest_url = URL(CORE_INGEST_URL)
+    session = _create_core_session()
+
+    async def _close_core_session(_event) -> None:
+        await session.close()
+
+    # Config entries aren't unloaded when HA stops, so close the session (and
+    # its connector) on shutdown too; a normal unload closes it itself
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _close_core_session)
+    )
 
     # Pull thermostat manufacturer/model from HA's device registry (if we have a climate entity)
     device_meta = {"manufacturer": None, "model": None}
@@ -536,6 +739,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         except Exception as e:
             _LOGGER.debug("SFP device meta lookup failed: %s", e)
 
+    # Identification fields are constant for this entry; every payload copies them
+    static_payload = _build_static_payload(
+        user_id,
+        hvac_id,
+        climate_eid,
+        thermostat_manufacturer=device_meta["manufacturer"],
+        thermostat_model=device_meta["model"],
+    )
+
     # Discover a humidity sensor on the same device as the climate entity.
     # Many thermostats don't expose humidity on the climate entity itself, so
     # we fall back to a sibling sensor with device_class=humidity.
@@ -555,72 +767,431 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     runtime_tracker = RuntimeTracker(hass, entry.entry_id)
     await runtime_tracker.load_state()
 
-    async def _post_to_core(payload: dict, is_retry: bool = False) -> bool:
-        """Post telemetry directly to Railway Core using Core JWT token."""
-        # Get Core JWT token (refreshes automatically if expired)
-        auth = SfpAuth(hass, entry)
-        core_token = await auth.ensure_core_token_valid()
+    # Core JWT cached in RAM so the per-post check is an integer compare;
+    # SfpAuth is only consulted when the token is missing or near expiry.
+    token_cache = {"core_token": None, "expires_at": 0}
+    # Single-flight: concurrent posts that find the token stale wait on one refresh
+    token_lock = asyncio.Lock()
+    auth = async_get_auth(hass, entry)
+
+    async def _get_core_token(rejected: Optional[str] = None) -> Optional[str]:
+        """Return the cached Core JWT, refreshing via SfpAuth when stale.
+
+        `rejected` is a token Core just answered 401 to; a new one is issued
+        only if the cache still holds it (another waiter may have replaced it).
+        """
+        def _cached() -> Optional[str]:
+            tok = token_cache["core_token"]
+            if not tok or tok == rejected:
+                return None
+            if time.time() >= token_cache["expires_at"] - CORE_TOKEN_SKEW_SECONDS:
+                return None
+            return tok
+
+        tok = _cached()
+        if tok:
+            return tok
+
+        async with token_lock:
+            # Re-check: whoever held the lock before us may have refreshed
+            tok = _cached()
+            if tok:
+                return tok
+
+            if rejected:
+                token = await auth._issue_core_token()
+            else:
+                token = await auth.ensure_core_token_valid()
+            token_cache["core_token"] = token
+            token_cache["expires_at"] = auth.core_token_exp or 0
+            _schedule_token_refresh()
+            return token
+
+    token_refresh_unsub = None
+    auth_refresh_unsub = None
+    # Re-arms the Bubble refresh timer after any successful refresh (set below)
+    unsub_auth_listener: Optional[Callable[[], None]] = None
+
+    @callback
+    def _cancel_core_refresh() -> None:
+        nonlocal token_refresh_unsub
+        if token_refresh_unsub is not None:
+            token_refresh_unsub()
+            token_refresh_unsub = None
+
+    @callback
+    def _cancel_auth_refresh() -> None:
+        nonlocal auth_refresh_unsub
+        if auth_refresh_unsub is not None:
+            auth_refresh_unsub()
+            auth_refresh_unsub = None
+
+    @callback
+    def _cancel_token_refresh() -> None:
+        nonlocal unsub_auth_listener
+        if unsub_auth_listener is not None:
+            unsub_auth_listener()
+            unsub_auth_listener = None
+        _cancel_core_refresh()
+        _cancel_auth_refresh()
+
+    @callback
+    def _schedule_token_refresh() -> None:
+        """Arm a timer to renew the Core JWT shortly before it goes stale."""
+        nonlocal token_refresh_unsub
+        _cancel_core_refresh()
+        exp = token_cache["expires_at"]
+        if not token_cache["core_token"] or not exp:
+            return
+        delay = exp - CORE_TOKEN_SKEW_SECONDS - CORE_TOKEN_REFRESH_LEAD_SECONDS - time.time()
+        # Floor the delay so a short-lived token can't turn this into a tight loop
+        token_refresh_unsub = async_call_later(hass, max(delay, 60), _proactive_token_refresh)
+
+    async def _proactive_token_refresh(_now) -> None:
+        nonlocal token_refresh_unsub
+        token_refresh_unsub = None
+        # Passing the current token as `rejected` forces a new one to be issued
+        await _get_core_token(rejected=token_cache["core_token"])
+
+    @callback
+    def _schedule_auth_refresh() -> None:
+        """Arm a timer to refresh the Bubble token before requests would have to."""
+        nonlocal auth_refresh_unsub
+        _cancel_auth_refresh()
+        exp = auth.expires_at
+        if exp is None:
+            return  # long-lived token
+        delay = exp - TOKEN_SKEW_SECONDS - CORE_TOKEN_REFRESH_LEAD_SECONDS - time.time()
+        # A failed refresh (e.g. revoked session) is retried at most this often;
+        # ensure_valid stays the inline fallback meanwhile
+        auth_refresh_unsub = async_call_later(
+            hass, max(delay, TOKEN_SKEW_SECONDS), _proactive_auth_refresh
+        )
+
+    async def _proactive_auth_refresh(_now) -> None:
+        nonlocal auth_refresh_unsub
+        auth_refresh_unsub = None
+        # A successful refresh re-arms the timer through the auth listener
+        await auth.force_refresh()
+        if auth_refresh_unsub is not None:
+            return
+        if auth.refresh_rejected:
+            # Retrying a revoked session only repeats the re-add error; the
+            # listener re-arms once any inline refresh succeeds again
+            _LOGGER.debug("SFP: Bubble refresh rejected; pausing proactive refresh")
+            return
+        _schedule_auth_refresh()
+
+    # Repeated Core failures (e.g. Core down for an hour) log one error per
+    # window instead of one per event
+    post_error = {"key": None, "at": 0.0, "suppressed": 0}
+
+    # Request headers are rebuilt only when the Core token changes
+    core_headers = {"token": None, "headers": CORE_BASE_HEADERS}
+
+    def _headers_for(core_token: str) -> dict:
+        if core_headers["token"] != core_token:
+            core_headers["headers"] = {
+                **CORE_BASE_HEADERS,
+                "Authorization": f"Bearer {core_token}",
+            }
+            core_headers["token"] = core_token
+        return core_headers["headers"]
+
+    def _log_post_error(key, msg: str, *args) -> None:
+        now_mono = time.monotonic()
+        if key == post_error["key"] and now_mono - post_error["at"] < POST_ERROR_LOG_INTERVAL:
+            post_error["suppressed"] += 1
+            _LOGGER.debug(msg, *args)
+            return
+        if not post_error["suppressed"]:
+            _LOGGER.error(msg, *args)
+        elif key == post_error["key"]:
+            _LOGGER.error(msg + " (%d similar errors suppressed)", *args, post_error["suppressed"])
+        else:
+            # The count belongs to the previous error, not this one
+            _LOGGER.error(
+                "SFP Core POST: %d more %s errors were suppressed",
+                post_error["suppressed"], getattr(post_error["key"], "__name__", post_error["key"]),
+            )
+            _LOGGER.error(msg, *args)
+        post_error.update(key=key, at=now_mono, suppressed=0)
+
+    async def _post_to_core(
+        payload: dict | list[dict],
+        is_retry: bool = False,
+        core_token: Optional[str] = None,
+        data: Optional[bytes] = None,
+    ) -> str:
+        """Post telemetry directly to Railway Core using Core JWT token.
+
+        Returns POST_OK, POST_REJECTED or POST_UNDELIVERED.
+        """
+        # Get Core JWT token (refreshes automatically if expired) unless the
+        # caller already resolved one for this flush
+        if core_token is None:
+            core_token = await _get_core_token()
 
         if not core_token:
             _LOGGER.warning("SFP: No valid core_token available; skipping Core post")
-            return False
+            return POST_UNDELIVERED
 
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {core_token}"
-        }
+        headers = _headers_for(core_token)
 
-        # Core expects array of events (batch endpoint)
-        body = [payload] if not isinstance(payload, list) else payload
+        # Core expects array of events (batch endpoint). Serialized once;
+        # the 401 retry reuses the same bytes.
+        if data is None:
+            body = [payload] if not isinstance(payload, list) else payload
+            data = json_bytes(body)
 
         if is_retry:
             _LOGGER.info("SFP: RETRY - Attempting Core post with refreshed token...")
 
-        _LOGGER.debug("SFP POST url=%s payload=%s", core_ingest_url, payload)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("SFP POST url=%s payload=%s", core_ingest_url, payload)
 
         try:
-            async with session.post(core_ingest_url, json=body, headers=headers, timeout=20) as resp:
-                txt = await resp.text()
+            async with session.post(core_ingest_url, data=data, headers=headers) as resp:
+                # Drain the body (keeps the connection reusable) but only
+                # decode the slice we might log
+                raw = await resp.read()
 
                 if resp.status >= 200 and resp.status < 300:
-                    _LOGGER.debug("SFP Core POST OK (%s): %s", resp.status, txt[:300])
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug("SFP Core POST OK (%s): %s", resp.status,
+                                      raw[:300].decode("utf-8", "replace"))
                     if is_retry:
                         _LOGGER.info("SFP: RETRY SUCCESSFUL!")
-                    return True
+                    return POST_OK
 
                 # Handle 401 - refresh Core token and retry once
                 if resp.status == 401 and not is_retry:
                     _LOGGER.warning("SFP Core POST 401 — refreshing token and retrying")
-                    # Force token refresh by getting a new one
-                    new_token = await auth._issue_core_token()
+                    # Replace the rejected token (once, however many posts saw the 401)
+                    new_token = await _get_core_token(rejected=core_token)
                     if new_token:
-                        return await _post_to_core(payload, is_retry=True)
+                        return await _post_to_core(
+                            payload, is_retry=True, core_token=new_token, data=data
+                        )
                     else:
                         _LOGGER.error("SFP: Failed to refresh core token")
-                        return False
+                        return POST_UNDELIVERED
+
+                # A batch can run to tens of KB; log its size rather than its
+                # contents (the debug log above has the full payload)
+                _log_post_error(resp.status, "SFP Core POST %s -> %s %s | %d event(s), %d bytes",
+                                core_ingest_url, resp.status,
+                                raw[:500].decode("utf-8", "replace"),
+                                len(payload) if isinstance(payload, list) else 1, len(data))
+                if 400 <= resp.status < 500 and resp.status not in (401, 429):
+                    return POST_REJECTED
+                return POST_UNDELIVERED
 
-                _LOGGER.error("SFP Core POST %s -> %s %s | payload=%s",
-                             core_ingest_url, resp.status, txt[:500], payload)
+        except Exception as e:
+            _log_post_error(type(e), "SFP Core POST error: %s", e)
+            return POST_UNDELIVERED
+
+    # Outgoing events are queued and sent to Core as one batch. Steady-state
+    # Telemetry_Update pings coalesce to the newest one within the debounce
+    # window; cycle boundaries and connectivity changes flush immediately
+    # (carrying any queued ping ahead of them, in order).
+    pending: list[dict] = []
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    last_flush_at = 0.0  # time.monotonic() of the last batch sent
+    # Flushes run in the background but one at a time (Lock is FIFO), so
+    # events reach Core in order and awaiting a flush also waits for any
+    # flush scheduled before it.
+    flush_lock = asyncio.Lock()
+    # True while a background flush is scheduled but hasn't taken the lock;
+    # that flush will pick up anything queued meanwhile, so one is enough.
+    flush_waiting = False
+    # Events Core didn't accept, oldest first, re-sent by _retry_failed.
+    # Failed attempts are counted by sequence_number: it is assigned before
+    # an event is first sent, kept on retries and never reused.
+    retry_queue = runtime_tracker.retry_queue
+    retry_attempts: dict[int, int] = {}
+    # Snapshot of the newest queued state; becomes last_sent_snapshot only
+    # once Core has accepted everything queued up to it
+    queued_snapshot = runtime_tracker.run_state.get("last_sent_snapshot")
+
+    async def _flush() -> None:
+        """Send everything queued as a single batch POST."""
+        async with flush_lock:
+            await _flush_locked()
+
+    async def _flush_locked() -> None:
+        nonlocal flush_handle, last_flush_at, flush_waiting
+        flush_waiting = False
+        if flush_handle is not None:
+            flush_handle.cancel()
+            flush_handle = None
+        if not pending:
+            return
+        last_flush_at = time.monotonic()
+
+        events = pending[:]
+        pending.clear()
+        # Sequence numbers are assigned at send time so coalesced pings
+        # never leave gaps for Core's gap detection.
+        # Retried events keep the number they were first sent with.
+        for event in events:
+            if "sequence_number" not in event:
+                event["sequence_number"] = runtime_tracker.get_and_increment_sequence()
+        runtime_tracker.save_state()
+
+        # One token lookup covers the batch and any per-event fallback
+        core_token = await _get_core_token()
+        if not core_token:
+            _LOGGER.warning("SFP: No valid core_token available; skipping Core post")
+            _queue_retry(events)
+            return
+
+        if await _send_events(events, core_token):
+            if not pending and not retry_queue:
+                runtime_tracker.run_state["last_sent_snapshot"] = queued_snapshot
+        runtime_tracker.save_state()
+
+    async def _send_events(events: list[dict], core_token: str) -> bool:
+        """POST events in batches; False if some were left for retry."""
+        # A backlog (e.g. after Core was unreachable) goes out in bounded chunks
+        for i in range(0, len(events), TELEMETRY_MAX_BATCH):
+            batch = events[i:i + TELEMETRY_MAX_BATCH]
+            result = await _post_to_core(batch, core_token=core_token)
+            if result == POST_OK:
+                _clear_retry(batch)
+                continue
+            if result == POST_UNDELIVERED:
+                # Core is down or unreachable; the rest of this flush would
+                # only time out the same way while holding flush_lock
+                _queue_retry(events[i:])
                 return False
+            if len(batch) == 1:
+                _drop_rejected(batch[0])
+                continue
 
-        except Exception as e:
-            _LOGGER.error("SFP Core POST error: %s", e)
-            return False
+            # Core rejected the batch; one event per request isolates the bad
+            # one. A 401 during the batch already refreshed the cache, so re-read it.
+            _LOGGER.debug("SFP: batch of %d events rejected, retrying individually", len(batch))
+            core_token = await _get_core_token()
+            for j, event in enumerate(batch):
+                result = await _post_to_core(event, core_token=core_token)
+                if result == POST_OK:
+                    _clear_retry((event,))
+                elif result == POST_REJECTED:
+                    _drop_rejected(event)
+                else:
+                    _queue_retry(events[i + j:])
+                    return False
+        return True
+
+    def _drop_rejected(event: dict) -> None:
+        # Core refused it outright; resending would only fail (and split the
+        # batch it joins) again
+        _clear_retry((event,))
+        _LOGGER.warning(
+            "SFP: Core rejected %s #%s; dropping it",
+            event.get("event_type"), event.get("sequence_number"),
+        )
+
+    def _clear_retry(events) -> None:
+        if retry_attempts:
+            for event in events:
+                retry_attempts.pop(event.get("sequence_number"), None)
+
+    def _queue_retry(events) -> None:
+        """Hold failed events for the next retry pass, up to the attempt limit."""
+        for event in events:
+            seq = event["sequence_number"]
+            attempts = retry_attempts.get(seq, 0) + 1
+            if attempts >= TELEMETRY_RETRY_ATTEMPTS:
+                retry_attempts.pop(seq, None)
+                _LOGGER.warning(
+                    "SFP: giving up on %s #%s after %d failed attempts",
+                    event.get("event_type"), event.get("sequence_number"), attempts,
+                )
+                continue
+            retry_attempts[seq] = attempts
+            retry_queue.append(event)
+        # Nothing queued is confirmed sent; force a prime if we reload first
+        runtime_tracker.run_state["last_sent_snapshot"] = None
+        while len(retry_queue) > TELEMETRY_RETRY_MAX:
+            dropped = retry_queue.pop(0)
+            _clear_retry((dropped,))
+            _LOGGER.warning(
+                "SFP: retry queue over %d events; dropped oldest %s",
+                TELEMETRY_RETRY_MAX, dropped.get("event_type"),
+            )
+        runtime_tracker.save_state()
+
+    async def _retry_failed(_now=None) -> None:
+        """Re-send failed events ahead of anything queued since."""
+        if not retry_queue:
+            return
+        _LOGGER.debug("SFP: retrying %d failed events", len(retry_queue))
+        pending[:0] = retry_queue
+        retry_queue.clear()
+        await _flush()
 
-    async def _post(payload: dict) -> None:
-        """Post telemetry to Railway Core."""
-        await _post_to_core(payload)
+    async def _final_flush() -> None:
+        """Unload path: send anything queued, including events awaiting retry."""
+        pending[:0] = retry_queue
+        retry_queue.clear()
+        await _flush()
+
+    @callback
+    def _schedule_flush() -> None:
+        nonlocal flush_handle
+        if flush_handle is None:
+            # Newest-wins coalescing means a longer wait only drops
+            # intermediate pings; the latest state is always what gets sent.
+            delay = max(
+                TELEMETRY_DEBOUNCE_SECONDS,
+                last_flush_at + TELEMETRY_MIN_INTERVAL_SECONDS - time.monotonic(),
+            )
+            flush_handle = hass.loop.call_later(
+                delay, lambda: hass.async_create_task(_flush())
+            )
+
+    async def _post(payload: dict, immediate: bool = False) -> None:
+        """Queue telemetry for Railway Core."""
+        nonlocal flush_waiting
+        if payload.get("event_type") == "Telemetry_Update" and not immediate:
+            # The newest ping replaces a ping still waiting; anything else
+            # queued (awaiting its background flush) is kept, in order.
+            if pending and pending[-1].get("event_type") == "Telemetry_Update":
+                # May be a re-queued ping; its attempt count goes with it
+                _clear_retry((pending[-1],))
+                pending[-1] = payload
+            else:
+                pending.append(payload)
+            _schedule_flush()
+            return
+
+        pending.append(payload)
+        if len(pending) > TELEMETRY_MAX_PENDING:
+            dropped = pending.pop(0)
+            _clear_retry((dropped,))
+            _LOGGER.warning(
+                "SFP: telemetry backlog over %d events; dropped oldest %s",
+                TELEMETRY_MAX_PENDING, dropped.get("event_type"),
+            )
+        # Don't hold state processing on the network round-trip
+        if not flush_waiting:
+            flush_waiting = True
+            hass.async_create_background_task(_flush(), "sfp_flush")
 
     async def _handle_state(new_state) -> None:
         """Send payload on every climate state change; mark cycle start/stop."""
-        if not _is_climate_available(new_state):
+        nonlocal queued_snapshot
+        available = _is_climate_available(new_state)
+        if not available:
             _LOGGER.debug("SFP: Device unavailable, posting is_reachable=false: %s",
                           new_state.state if new_state else "None")
 
             # If there was an active cycle running, close it before reporting offline
             was_active = bool(runtime_tracker.run_state.get("is_active"))
-            now = datetime.now(timezone.utc)
+            now = dt_util.utcnow()
+            now_iso = now.isoformat()
             previous_status = runtime_tracker.run_state.get("last_equipment_status", "Idle")
 
             if was_active:
@@ -628,24 +1199,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 secs = _calculate_runtime_seconds(start, now)
                 end_payload = _build_payload(
                     new_state,
-                    user_id=user_id,
-                    hvac_id=hvac_id,
-                    entity_id=new_state.entity_id if new_state else climate_eid,
+                    static_payload,
+                    now_iso,
                     hvac_mode=new_state.state if new_state else None,
                     runtime_seconds=secs,
                     cycle_start=start.isoformat() if start else None,
-                    cycle_end=now.isoformat(),
+                    cycle_end=now_iso,
                     connected=False,
                     is_reachable=False,
                     device_name=new_state.name if new_state else None,
-                    thermostat_manufacturer=device_meta.get("manufacturer"),
-                    thermostat_model=device_meta.get("model"),
                     event_type="Mode_Change",
                     previous_status=previous_status,
                     runtime_type="END",
                     humidity_fallback=_read_humidity_from_entity(hass, humidity_entity_id),
                 )
-                end_payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
                 await _post(end_payload)
                 runtime_tracker.record_post(previous_status)
                 runtime_tracker.run_state["active_since"] = None
@@ -655,46 +1222,45 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             # Post explicit offline/unreachable event so Core knows
             offline_payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id if new_state else climate_eid,
+                static_payload,
+                now_iso,
                 hvac_mode=new_state.state if new_state else None,
                 connected=False,
                 is_reachable=False,
                 device_name=new_state.name if new_state else None,
-                thermostat_manufacturer=device_meta.get("manufacturer"),
-                thermostat_model=device_meta.get("model"),
                 event_type="CONNECTIVITY_CHANGE",
                 previous_status=previous_status,
                 humidity_fallback=_read_humidity_from_entity(hass, humidity_entity_id),
             )
-            offline_payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
             await _post(offline_payload)
+            # Core now thinks we're offline; force a prime on the next reload
+            queued_snapshot = None
+            runtime_tracker.run_state["last_sent_snapshot"] = None
             runtime_tracker.record_post("Idle")
             runtime_tracker.run_state["last_is_reachable"] = False
-            await runtime_tracker.save_state()
+            runtime_tracker.save_state()
             return
 
+        # One timestamp for everything this state change emits
+        now = dt_util.utcnow()
+        now_iso = now.isoformat()
+
         # Detect offline → online transition and send CONNECTIVITY_CHANGE
         was_reachable = runtime_tracker.run_state.get("last_is_reachable")
         if was_reachable is False:
             _LOGGER.info("SFP: Device back online, sending CONNECTIVITY_CHANGE (is_reachable=true)")
             online_payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=new_state.state,
                 connected=True,
                 is_reachable=True,
                 device_name=new_state.name,
-                thermostat_manufacturer=device_meta.get("manufacturer"),
-                thermostat_model=device_meta.get("model"),
                 event_type="CONNECTIVITY_CHANGE",
                 previous_status=runtime_tracker.run_state.get("last_equipment_status", "Idle"),
                 humidity_fallback=_read_humidity_from_entity(hass, humidity_entity_id),
             )
-            online_payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
             await _post(online_payload)
             runtime_tracker.record_post("Idle")
 
@@ -703,6 +1269,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         attrs = (new_state.attributes or {})
         hvac_mode = new_state.state  # Current thermostat mode (heat/cool/auto/off)
         hvac_action = attrs.get("hvac_action")
+        last_action = runtime_tracker.run_state.get("last_action")
         classified_mode = _classify_mode(attrs)  # 'heating' | 'cooling' | 'fanonly' | 'idle'
         is_active = _attrs_is_active(attrs)
         was_active = bool(runtime_tracker.run_state.get("is_active"))
@@ -728,19 +1295,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             runtime_tracker.run_state["last_active_mode"] = classified_mode
 
         payload = None
-        now = datetime.now(timezone.utc)
 
         # Pre-resolve humidity fallback once per state change so every payload
         # this handler emits sees the same value.
         humidity_fallback = _read_humidity_from_entity(hass, humidity_entity_id)
+        signature = _payload_signature(new_state, humidity_fallback)
 
         common_kwargs = dict(
-            thermostat_manufacturer=device_meta.get("manufacturer"),
-            thermostat_model=device_meta.get("model"),
-            connected=_is_climate_available(new_state),
+            connected=available,
             device_name=new_state.name,
             last_mode=runtime_tracker.run_state.get("last_active_mode") if classified_mode == "idle" else classified_mode,
-            is_reachable=_is_climate_available(new_state),
+            is_reachable=available,
             previous_status=previous_status,
             humidity_fallback=humidity_fallback,
         )
@@ -750,9 +1315,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             runtime_tracker.run_state["active_since"] = now
             payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=hvac_mode,
                 event_type="Mode_Change",
                 **common_kwargs,
@@ -773,18 +1337,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             )
             payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=hvac_mode,
                 runtime_seconds=secs,
                 cycle_start=start.isoformat() if start else None,
-                cycle_end=now.isoformat(),
+                cycle_end=now_iso,
                 last_mode=lm,
-                is_reachable=_is_climate_available(new_state),
-                thermostat_manufacturer=device_meta.get("manufacturer"),
-                thermostat_model=device_meta.get("model"),
-                connected=_is_climate_available(new_state),
+                is_reachable=available,
+                connected=available,
                 device_name=new_state.name,
                 event_type="Mode_Change",
                 previous_status=previous_status,
@@ -806,16 +1367,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             # Send Mode_Change event to close the previous segment
             end_payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=hvac_mode,
                 runtime_seconds=secs,
                 cycle_start=start.isoformat() if start else None,
-                cycle_end=now.isoformat(),
+                cycle_end=now_iso,
                 event_type="Mode_Change",
                 runtime_type="END",
-                previous_status=previous_status,
                 **common_kwargs,
             )
 
@@ -824,7 +1383,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 previous_status, secs, equipment_status
             )
 
-            end_payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
             await _post(end_payload)
             runtime_tracker.record_post(previous_status)
 
@@ -834,21 +1392,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             # Send Telemetry_Update for the new state
             payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=hvac_mode,
                 event_type="Telemetry_Update",
                 **common_kwargs,
             )
 
+        elif runtime_tracker.should_skip_duplicate_post(equipment_status, "Telemetry_Update"):
+            # Debounce: same status posted within 3 seconds — nothing to send,
+            # so don't build a payload just to drop it
+            pass
+
+        elif signature == runtime_tracker.run_state.get("last_signature"):
+            # Values drifted and came back (e.g. 72.0 -> 72.1 -> 72.0) since
+            # the last post; Core already has exactly this ping
+            pass
+
         else:
             # steady-state ping (telemetry update) — no status change
             payload = _build_payload(
                 new_state,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=new_state.entity_id,
+                static_payload,
+                now_iso,
                 hvac_mode=hvac_mode,
                 event_type="Telemetry_Update",
                 **common_kwargs,
@@ -861,27 +1427,100 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         runtime_tracker.run_state["last_action"] = hvac_action
         runtime_tracker.run_state["is_active"] = is_active
 
-        # Save state after each change
-        await runtime_tracker.save_state()
-
         if payload:
-            event_type = payload.get("event_type", "Telemetry_Update")
-            # Debounce: skip duplicate Telemetry_Update posts within 3 seconds
-            if runtime_tracker.should_skip_duplicate_post(equipment_status, event_type):
-                return
-
-            payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
             await _post(payload)
             runtime_tracker.record_post(equipment_status)
+            queued_snapshot = _state_snapshot(new_state)
+            runtime_tracker.run_state["last_signature"] = signature
+
+        # Save state after each change (debounced by the Store). A debounced
+        # ping that left every persisted field as it was has nothing to save.
+        if (
+            payload
+            or is_active != was_active
+            or equipment_status != previous_status
+            or hvac_action != last_action
+        ):
+            runtime_tracker.save_state()
+
+    # Bursts of attribute-only updates are collapsed to the newest state:
+    # the first runs right away, the last after STATE_COALESCE_SECONDS of
+    # quiet. Anything that crosses a boundary bypasses the debouncer.
+    pending_state = None
+
+    async def _handle_pending_state() -> None:
+        nonlocal pending_state
+        st = pending_state
+        pending_state = None
+        if st is not None:
+            await _handle_state(st)
+
+    state_debouncer = Debouncer(
+        hass,
+        _LOGGER,
+        cooldown=STATE_COALESCE_SECONDS,
+        immediate=True,
+        function=_handle_pending_state,
+    )
+
+    # Boundary states run as their own tasks; unload waits for them so none
+    # queues an event or saves state after the final flush
+    state_tasks: set[asyncio.Task] = set()
+
+    async def _drain_state_tasks() -> None:
+        if state_tasks:
+            await asyncio.gather(*state_tasks, return_exceptions=True)
+
+    @callback
+    def _cancel_pending_state() -> None:
+        nonlocal pending_state
+        state_debouncer.async_cancel()
+        pending_state = None
+
+    def _is_boundary(new_state) -> bool:
+        """True if this state would start/end a cycle, change status or reachability."""
+        rs = runtime_tracker.run_state
+        if not _is_climate_available(new_state) or rs.get("last_is_reachable") is False:
+            return True
+        attrs = new_state.attributes or {}
+        if _attrs_is_active(attrs) != bool(rs.get("is_active")):
+            return True
+        return _classify_8_state(attrs, new_state.state) != rs.get("last_equipment_status", "Idle")
 
     @callback
-    async def _on_change(event):
+    def _on_change(event):
+        nonlocal pending_state
+        # Subscribed to climate_eid only, so no entity_id check is needed here.
+        # Runs synchronously in the dispatcher; a task is only created for
+        # changes we actually report on.
         new = event.data.get("new_state")
-        if new and (not climate_eid or new.entity_id == climate_eid):
-            await _handle_state(new)
+        if not (new and _state_changed_materially(event.data.get("old_state"), new)):
+            return
+
+        if _is_boundary(new):
+            # This state supersedes anything still waiting
+            _cancel_pending_state()
+            task = hass.async_create_task(_handle_state(new))
+            state_tasks.add(task)
+            task.add_done_callback(state_tasks.discard)
+            return
+
+        pending_state = new
+        state_debouncer.async_schedule_call()
+
+    # Refresh the Bubble token off the request path; telemetry, status polls
+    # and the reset button all share this auth
+    _schedule_auth_refresh()
+    unsub_auth_listener = auth.async_add_refresh_listener(_schedule_auth_refresh)
+
+    # Events Core failed to accept are re-sent once a minute
+    unsub_retry = async_track_time_interval(
+        hass, _retry_failed, timedelta(seconds=TELEMETRY_RETRY_INTERVAL_SECONDS)
+    )
 
     # Only watch telemetry if a climate entity was chosen in the flow
     unsub_telemetry = None
+    prime_task: Optional[asyncio.Task] = None
     if climate_eid:
         _LOGGER.debug("SFP telemetry watching %s", climate_eid)
         unsub_telemetry = async_track_state_change_event(hass, [climate_eid], _on_change)
@@ -907,20 +1546,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             # If we restored an active_since from storage, don't overwrite it
             if runtime_tracker.run_state["active_since"] is None and current_active:
                 # If HA/integration just started mid-cycle, true start is unknown; seed to now.
-                runtime_tracker.run_state["active_since"] = datetime.now(timezone.utc)
+                runtime_tracker.run_state["active_since"] = dt_util.utcnow()
                 _LOGGER.info("SFP: Started mid-cycle, seeding active_since to now")
 
-            await runtime_tracker.save_state()
-            await _handle_state(st)
+            runtime_tracker.save_state()
+            # Skip the prime after a reload/restart if nothing we report has
+            # changed since the last post (snapshot persisted with run_state)
+            if runtime_tracker.run_state.get("last_sent_snapshot") == _state_snapshot(st):
+                _LOGGER.debug("SFP: State unchanged since last post, skipping initial send")
+            else:
+                # Don't hold up entry setup (and entity creation) on a network POST
+                prime_task = hass.async_create_background_task(
+                    _handle_state(st), "sfp_initial_send"
+                )
     else:
         _LOGGER.debug("SFP telemetry disabled (no climate entity chosen)")
 
-    async def _svc_send_now(call):
+    async def _send_now() -> None:
         if not climate_eid:
             _LOGGER.warning("SFP send_now called but no climate entity configured.")
             return
         s = hass.states.get(climate_eid)
-        if s and _is_climate_available(s):
+        available = _is_climate_available(s)
+        if available:
             attrs = s.attributes or {}
             classified_mode = _classify_mode(attrs)
             lm = (runtime_tracker.run_state.get("last_active_mode")
@@ -929,54 +1577,90 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             previous_status = runtime_tracker.run_state.get("last_equipment_status", "Idle")
             send_now_payload = _build_payload(
                 s,
-                user_id=user_id,
-                hvac_id=hvac_id,
-                entity_id=climate_eid,
-                connected=_is_climate_available(s),
+                static_payload,
+                _now_iso(),
+                connected=available,
                 device_name=s.name,
-                thermostat_manufacturer=device_meta.get("manufacturer"),
-                thermostat_model=device_meta.get("model"),
                 last_mode=lm,
-                is_reachable=_is_climate_available(s),
+                is_reachable=available,
                 event_type="Telemetry_Update",
                 previous_status=previous_status,
                 humidity_fallback=_read_humidity_from_entity(hass, humidity_entity_id),
             )
-            send_now_payload["sequence_number"] = runtime_tracker.get_and_increment_sequence()
-            await _post(send_now_payload)
-
-    hass.services.async_register(DOMAIN, "send_now", _svc_send_now)
+            await _post(send_now_payload, immediate=True)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
-        STORAGE_KEY: {"unsub_telemetry": unsub_telemetry, "runtime_tracker": runtime_tracker}
-    }
+    hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})[STORAGE_KEY] = TelemetryState(
+        runtime_tracker=runtime_tracker,
+        session=session,
+        flush=_final_flush,
+        send_now=_send_now,
+        cancel_pending_state=_cancel_pending_state,
+        cancel_token_refresh=_cancel_token_refresh,
+        unsub_retry=unsub_retry,
+        drain_state=_drain_state_tasks,
+        unsub_telemetry=unsub_telemetry,
+        prime_task=prime_task,
+    )
+    hass.data[DOMAIN][entry.entry_id]["config"] = _entry_config(entry)
     entry.async_on_unload(entry.add_update_listener(_reload))
     return True
 
 
+def _entry_config(entry: ConfigEntry) -> dict:
+    """The entry's settings without its tokens."""
+    return {
+        "data": {k: v for k, v in entry.data.items() if k not in TOKEN_KEYS},
+        "options": dict(entry.options),
+    }
+
+
 async def _reload(hass: HomeAssistant, entry: ConfigEntry):
+    # Bubble and Core token refreshes land here too; a reload for those would
+    # flush, close the Core session and restart polling for nothing
+    config = hass.data.get(DOMAIN, {}).get(entry.entry_id, {}).get("config")
+    if config == _entry_config(entry):
+        _LOGGER.debug("SFP: token-only entry update; not reloading")
+        return
     await hass.config_entries.async_reload(entry.entry_id)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     data = hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
-    if data and STORAGE_KEY in data:
-        unsub = data[STORAGE_KEY].get("unsub_telemetry")
-        if unsub:
+    telemetry: Optional[TelemetryState] = (data or {}).get(STORAGE_KEY)
+    if telemetry:
+        if telemetry.unsub_telemetry:
             try:
-                unsub()
+                telemetry.unsub_telemetry()
             except Exception:
                 pass
-        
+
+        telemetry.unsub_retry()
+        telemetry.cancel_pending_state()
+        telemetry.cancel_token_refresh()
+
+        prime_task = telemetry.prime_task
+        if prime_task and not prime_task.done():
+            prime_task.cancel()
+
+        # Let in-flight state changes queue their events before the flush
+        await telemetry.drain_state()
+
+        # Send anything still queued (and awaiting retry) before the session
+        # goes away
+        try:
+            await telemetry.flush()
+        except Exception:
+            pass
+
         # Save final state before unloading
-        runtime_tracker = data[STORAGE_KEY].get("runtime_tracker")
-        if runtime_tracker:
-            try:
-                await runtime_tracker.save_state()
-            except Exception:
-                pass
+        try:
+            await telemetry.runtime_tracker.async_shutdown()
+        except Exception:
+            pass
+
+        await telemetry.session.close()
     
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     return unload_ok
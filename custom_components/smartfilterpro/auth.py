@@ -1,24 +1,62 @@
 from __future__ import annotations
-import time, json, logging, aiohttp
-from typing import Optional
+import asyncio, re, time, logging, aiohttp
+from typing import Callable, Optional
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.json import json_loads
 from .const import (
+    DOMAIN,
     CONF_API_BASE, CONF_REFRESH_PATH, CONF_ACCESS_TOKEN,
     CONF_REFRESH_TOKEN, CONF_EXPIRES_AT, DEFAULT_REFRESH_PATH, TOKEN_SKEW_SECONDS,
     CONF_CORE_JWT_PATH, CONF_CORE_TOKEN, CONF_CORE_TOKEN_EXP,
     CONF_USER_ID, DEFAULT_CORE_JWT_PATH, CORE_TOKEN_SKEW_SECONDS,
+    HTTP_RETRY_ATTEMPTS, HTTP_RETRY_BACKOFF_SECONDS, BUBBLE_TIMEOUT,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+async def async_post_with_retry(
+    session: aiohttp.ClientSession, url: str, **kwargs
+) -> tuple[int, str]:
+    """POST and return (status, body text), retrying transient failures.
+
+    5xx/429 responses and connection errors are retried with exponential
+    backoff; other statuses are returned at once. The last attempt's
+    response is returned (or its exception raised).
+    """
+    for attempt in range(HTTP_RETRY_ATTEMPTS - 1):
+        try:
+            async with session.post(url, **kwargs) as r:
+                if r.status < 500 and r.status != 429:
+                    return r.status, await r.text()
+                _LOGGER.debug("POST %s -> %s; retrying", url, r.status)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            _LOGGER.debug("POST %s failed (%s); retrying", url, e)
+        await asyncio.sleep(HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+    async with session.post(url, **kwargs) as r:
+        return r.status, await r.text()
+
+
+# Case-insensitive (error/message are compared lowercased) and needs no
+# lowered copy of the body
+_SOFT_401_MARKERS = re.compile(r"401|invalid_token|access token", re.IGNORECASE)
+
+
 def is_bubble_soft_401(txt: str) -> bool:
     """
     Detect Bubble's 'HTTP 200 but auth failed' pattern, where the JSON body
     encodes status=401 or error='invalid_token'.
     """
+    # Plain-text / empty bodies can't carry the JSON error envelope; skip the parse
+    if not txt or txt.lstrip()[:1] not in ("{", "["):
+        return False
+    # Every auth-failure shape checked below needs one of these markers; a
+    # clean response is rejected with one regex scan instead of a full parse
+    if not _SOFT_401_MARKERS.search(txt):
+        return False
     try:
-        data = json.loads(txt) if txt else {}
+        data = json_loads(txt)
     except Exception:
         return False
 
@@ -57,6 +95,32 @@ class SfpAuth:
     """Centralized token helper for SmartFilterPro."""
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         self.hass, self.entry = hass, entry
+        # Endpoint settings only change through the flow, which reloads the
+        # entry (and with it this instance), so the URLs are built once
+        base = (entry.data.get(CONF_API_BASE) or "").rstrip("/")
+        self._refresh_url = f"{base}/{(entry.data.get(CONF_REFRESH_PATH) or DEFAULT_REFRESH_PATH).strip('/')}"
+        self._core_jwt_url = f"{base}/{(entry.data.get(CONF_CORE_JWT_PATH) or DEFAULT_CORE_JWT_PATH).strip('/')}"
+        # time.monotonic() until which the current access token is known-good,
+        # so the common ensure_valid() call is a single float compare that a
+        # wall-clock step can't move
+        self._valid_until: float = 0.0
+        # One refresh at a time: Bubble may rotate the refresh_token per use,
+        # so concurrent refreshes would race and invalidate each other
+        self._refresh_lock = asyncio.Lock()
+        # Set when Bubble refused the refresh token itself (4xx/soft-401): only
+        # a new login fixes that, so background refreshes stop until one works
+        self.refresh_rejected = False
+        self._refresh_listeners: list[Callable[[], None]] = []
+        # The Core JWT is short-lived and re-issued from the Bubble token, so it
+        # lives in memory only; entries written by older versions seed it
+        self._core_token: Optional[str] = entry.data.get(CONF_CORE_TOKEN)
+        v = entry.data.get(CONF_CORE_TOKEN_EXP)
+        self._core_token_exp: Optional[int] = int(v) if v is not None else None
+
+    def async_add_refresh_listener(self, cb: Callable[[], None]) -> Callable[[], None]:
+        """Call cb after every successful token refresh; returns a remover."""
+        self._refresh_listeners.append(cb)
+        return lambda: self._refresh_listeners.remove(cb)
 
     @property
     def access_token(self) -> Optional[str]:
@@ -71,36 +135,77 @@ class SfpAuth:
         v = self.entry.data.get(CONF_EXPIRES_AT)
         return int(v) if v is not None else None
 
+    def _mark_valid(self, exp: int) -> None:
+        """Convert the epoch expiry (less skew) to a monotonic deadline."""
+        self._valid_until = time.monotonic() + (exp - TOKEN_SKEW_SECONDS - time.time())
+
     async def ensure_valid(self) -> None:
+        if time.monotonic() < self._valid_until:
+            return
         exp = self.expires_at
         if exp is None:
             return  # treat as long-lived
         if int(time.time()) < exp - TOKEN_SKEW_SECONDS:
+            self._mark_valid(exp)
             return
-        await self._refresh()
+        async with self._refresh_lock:
+            # Another caller may have refreshed while we waited
+            if time.monotonic() < self._valid_until:
+                return
+            await self._refresh()
+
+    async def force_refresh(self) -> None:
+        """Refresh now regardless of expiry (e.g. the API rejected the token)."""
+        rejected = self.access_token
+        async with self._refresh_lock:
+            if self.access_token != rejected:
+                return  # already replaced by a concurrent refresh
+            self._valid_until = 0.0
+            if self.expires_at is None:
+                return  # long-lived token; nothing to refresh
+            await self._refresh()
+
+    async def _post_refresh(self, url: str, rt: str) -> tuple[int, str]:
+        """POST the refresh token once; only a failed connect is retried.
+
+        Not idempotent: Bubble may rotate the refresh token on use, so if the
+        response were lost, a resend would carry an already-spent token.
+        """
+        session = async_get_clientsession(self.hass)
+        body = {"refresh_token": rt}
+        for attempt in range(HTTP_RETRY_ATTEMPTS - 1):
+            try:
+                async with session.post(url, json=body, timeout=BUBBLE_TIMEOUT) as r:
+                    return r.status, await r.text()
+            except aiohttp.ClientConnectorError as e:
+                # The connection never opened, so Bubble never saw the token
+                _LOGGER.debug("Token refresh connect failed (%s); retrying", e)
+            await asyncio.sleep(HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+        async with session.post(url, json=body, timeout=BUBBLE_TIMEOUT) as r:
+            return r.status, await r.text()
 
     async def _refresh(self) -> bool:
         """Refresh tokens. Returns True on success, False on failure."""
         rt = self.refresh_token
         if not rt:
             _LOGGER.warning("No refresh_token; cannot refresh. Please delete and re-add the integration.")
+            self.refresh_rejected = True
             return False
-        base = (self.entry.data.get(CONF_API_BASE) or "").rstrip("/")
-        path = (self.entry.data.get(CONF_REFRESH_PATH) or DEFAULT_REFRESH_PATH).strip("/")
-        url  = f"{base}/{path}"
+        url = self._refresh_url
 
         try:
-            async with aiohttp.ClientSession() as s:
-                async with s.post(url, json={"refresh_token": rt}, timeout=20) as r:
-                    txt = await r.text()
-                    if r.status >= 400 or is_bubble_soft_401(txt):
-                        _LOGGER.error(
-                            "Token refresh failed (%s). Your session may have expired. "
-                            "Please delete and re-add the SmartFilterPro integration. Response: %s",
-                            r.status, txt[:400]
-                        )
-                        return False
-                    data = json.loads(txt) if txt else {}
+            # HA's shared session: pooled, keep-alive connections to Bubble
+            status, txt = await self._post_refresh(url, rt)
+            if status >= 400 or is_bubble_soft_401(txt):
+                _LOGGER.error(
+                    "Token refresh failed (%s). Your session may have expired. "
+                    "Please delete and re-add the SmartFilterPro integration. Response: %s",
+                    status, txt[:400]
+                )
+                # A 5xx is Bubble having trouble, not a verdict on the token
+                self.refresh_rejected = status < 500 or is_bubble_soft_401(txt)
+                return False
+            data = json_loads(txt) if txt else {}
         except Exception as e:
             _LOGGER.error("Refresh call failed: %s", e)
             return False
@@ -117,28 +222,29 @@ class SfpAuth:
             )
             return False
 
-        new_data = dict(self.entry.data)
-        new_data.update({
+        # Updates self.entry in place, so future reads see the new tokens
+        self.hass.config_entries.async_update_entry(self.entry, data={
+            **self.entry.data,
             CONF_ACCESS_TOKEN: at,
             CONF_REFRESH_TOKEN: new_rt,
             CONF_EXPIRES_AT: int(exp),
         })
-        self.hass.config_entries.async_update_entry(self.entry, data=new_data)
-        # re-fetch entry so future reads see updated tokens
-        self.entry = self.hass.config_entries.async_get_entry(self.entry.entry_id)
+        self._mark_valid(int(exp))
+        self.refresh_rejected = False
         _LOGGER.debug("Token refreshed; exp=%s", exp)
+        for cb in tuple(self._refresh_listeners):
+            cb()
         return True
 
     # ========== Core Token (for Railway Core Ingest) ==========
 
     @property
     def core_token(self) -> Optional[str]:
-        return self.entry.data.get(CONF_CORE_TOKEN)
+        return self._core_token
 
     @property
     def core_token_exp(self) -> Optional[int]:
-        v = self.entry.data.get(CONF_CORE_TOKEN_EXP)
-        return int(v) if v is not None else None
+        return self._core_token_exp
 
     async def ensure_core_token_valid(self) -> Optional[str]:
         """Ensure Core token is valid; refresh if expired. Returns token or None."""
@@ -146,7 +252,8 @@ class SfpAuth:
         now_sec = int(time.time())
 
         if self.core_token and exp and now_sec < (exp - CORE_TOKEN_SKEW_SECONDS):
-            _LOGGER.debug("Core token valid (expires in %ss)", exp - now_sec)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Core token valid (expires in %ss)", exp - now_sec)
             return self.core_token
 
         _LOGGER.debug("Core token expired or missing, requesting new one...")
@@ -162,21 +269,20 @@ class SfpAuth:
             _LOGGER.warning("Cannot issue core token — no Bubble access_token")
             return None
 
-        base = (self.entry.data.get(CONF_API_BASE) or "").rstrip("/")
-        path = (self.entry.data.get(CONF_CORE_JWT_PATH) or DEFAULT_CORE_JWT_PATH).strip("/")
-        url = f"{base}/{path}"
+        url = self._core_jwt_url
         user_id = self.entry.data.get(CONF_USER_ID)
 
         try:
             _LOGGER.info("Requesting new core_token from Bubble: %s", url)
-            async with aiohttp.ClientSession() as s:
-                headers = {"Authorization": f"Bearer {at}"}
-                async with s.post(url, json={"user_id": user_id}, headers=headers, timeout=20) as r:
-                    txt = await r.text()
-                    if r.status >= 400:
-                        _LOGGER.error("Core token request failed: %s -> %s %s", url, r.status, txt[:400])
-                        return None
-                    data = json.loads(txt) if txt else {}
+            headers = {"Authorization": f"Bearer {at}"}
+            status, txt = await async_post_with_retry(
+                async_get_clientsession(self.hass), url,
+                json={"user_id": user_id}, headers=headers, timeout=BUBBLE_TIMEOUT,
+            )
+            if status >= 400:
+                _LOGGER.error("Core token request failed: %s -> %s %s", url, status, txt[:400])
+                return None
+            data = json_loads(txt) if txt else {}
         except Exception as e:
             _LOGGER.error("Core token request exception: %s", e)
             return None
@@ -191,13 +297,22 @@ class SfpAuth:
             _LOGGER.error("Core token response missing token: %s", body)
             return None
 
-        # Store the new Core token
-        new_data = dict(self.entry.data)
-        new_data[CONF_CORE_TOKEN] = core
-        if exp:
-            new_data[CONF_CORE_TOKEN_EXP] = int(exp)
-
-        self.hass.config_entries.async_update_entry(self.entry, data=new_data)
-        self.entry = self.hass.config_entries.async_get_entry(self.entry.entry_id)
+        # Kept in memory: timed renewals shouldn't rewrite the config
+        # entry on disk
+        self._core_token = core
+        self._core_token_exp = int(exp) if exp else None
         _LOGGER.info("Core token refreshed (exp: %s)", exp)
         return core
+
+
+def async_get_auth(hass: HomeAssistant, entry: ConfigEntry) -> SfpAuth:
+    """Return the entry's shared SfpAuth, creating it on first use.
+
+    Telemetry, the status coordinator and the reset button all go through
+    the same instance instead of constructing one per request.
+    """
+    bucket = hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})
+    auth = bucket.get("auth")
+    if auth is None:
+        auth = bucket["auth"] = SfpAuth(hass, entry)
+    return auth
@@ -1,53 +1,31 @@
 from __future__ import annotations
 
-import aiohttp, asyncio, json, logging, time
-from typing import Optional, Any, Iterable
+import logging
+from typing import Optional
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity import DeviceInfo
 
 from .const import (
     DOMAIN,
     CONF_API_BASE, CONF_RESET_PATH, CONF_USER_ID, CONF_HVAC_ID,
-    CONF_ACCESS_TOKEN, CONF_REFRESH_TOKEN, CONF_EXPIRES_AT, CONF_REFRESH_PATH,
     CONF_CLIMATE_ENTITY_ID,
-    DEFAULT_RESET_PATH, DEFAULT_REFRESH_PATH, TOKEN_SKEW_SECONDS,
+    DEFAULT_RESET_PATH, BUBBLE_TIMEOUT,
 )
-from .auth import SfpAuth, is_bubble_soft_401
+from .auth import async_get_auth, async_post_with_retry, is_bubble_soft_401
+from .util import normalize_hvac
 
 _LOGGER = logging.getLogger(__name__)
 
-
-def _normalize_hvac(val: Any) -> Optional[str]:
-    if val is None:
-        return None
-    if isinstance(val, (list, tuple, set)):
-        for item in val:
-            return str(item)
-        return None
-    s = str(val).strip()
-    if s.startswith("[") and s.endswith("]"):
-        try:
-            js = s.replace("'", '"') if ("'" in s and '"' not in s) else s
-            arr = json.loads(js)
-            if isinstance(arr, Iterable):
-                for item in arr:
-                    return str(item)
-        except Exception:
-            s = s.strip("[]").strip().strip("'").strip('"')
-            return s or None
-    return s or None
-
-
-async def _ensure_valid_token(hass: HomeAssistant, entry: ConfigEntry) -> Optional[str]:
-    """Return an access token, refreshing with SfpAuth if near/at expiry."""
-    auth = SfpAuth(hass, entry)
-    await auth.ensure_valid()
-    updated = hass.config_entries.async_get_entry(entry.entry_id)
-    return (updated.data if updated else entry.data).get(CONF_ACCESS_TOKEN)
+# _post_reset outcomes; only UNAUTHORIZED is worth a token refresh and retry
+# (transient failures were already retried inside async_post_with_retry)
+_RESET_OK = "ok"
+_RESET_UNAUTHORIZED = "unauthorized"
+_RESET_FAILED = "failed"
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
@@ -61,10 +39,39 @@ class SmartFilterProResetButton(ButtonEntity):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         self.hass = hass
         self.entry = entry
+        self._auth = async_get_auth(hass, entry)
         raw = entry.data.get(CONF_HVAC_ID, "unknown")
-        hvac_id = _normalize_hvac(raw) or "unknown"
+        hvac_id = normalize_hvac(raw) or "unknown"
         self._attr_unique_id = f"{DOMAIN}_reset_{entry.entry_id}_{hvac_id}"
 
+        # Config changes reload the entry, which recreates this entity
+        api_base = (entry.data.get(CONF_API_BASE) or "").rstrip("/")
+        reset_path = (entry.data.get(CONF_RESET_PATH) or DEFAULT_RESET_PATH).strip("/")
+        user_id = entry.data.get(CONF_USER_ID)
+        hvac_uid = normalize_hvac(entry.data.get(CONF_HVAC_ID))
+        self._reset_url: Optional[str] = None
+        self._reset_payload: Optional[dict] = None
+        if api_base and user_id and hvac_uid:
+            self._reset_url = f"{api_base}/{reset_path}"
+            self._reset_payload = {"user_id": user_id, "hvac_id": hvac_uid}
+
+        # Bubble can lag the reset by a moment, so the status sensors are
+        # polled once after it settles, however many times the button is pressed
+        self._followup = Debouncer(
+            hass, _LOGGER, cooldown=3.0, immediate=False, function=self._followup_refresh
+        )
+
+    def _status_coord(self):
+        return self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("status_coord")
+
+    async def _followup_refresh(self) -> None:
+        coord = self._status_coord()
+        if coord:
+            await coord.async_request_refresh()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._followup.async_cancel()
+
     @property
     def device_info(self) -> DeviceInfo:
         """Dynamic device name: prefer Bubble's device_name, fallback to HA climate name."""
@@ -95,67 +102,55 @@ class SmartFilterProResetButton(ButtonEntity):
             model="Filter telemetry bridge",
         )
 
-    async def _post_reset(self, url: str, payload: dict, headers: dict) -> bool:
-        """POST reset, handle 401/soft-401 by returning False so caller can refresh+retry."""
+    async def _post_reset(self, url: str, payload: dict, headers: dict) -> str:
+        """POST reset; a 401/soft-401 returns _RESET_UNAUTHORIZED so caller can refresh+retry."""
         try:
-            async with async_get_clientsession(self.hass).post(
-                url, json=payload, headers=headers, timeout=25
-            ) as resp:
-                txt = await resp.text()
-                if resp.status == 401 or is_bubble_soft_401(txt):
-                    _LOGGER.warning(
-                        "SFP reset: unauthorized (HTTP=%s, soft401=%s). Will try a token refresh.",
-                        resp.status, is_bubble_soft_401(txt),
-                    )
-                    return False
-                if resp.status >= 400:
-                    _LOGGER.error("SFP reset: POST %s -> %s %s | payload=%s", url, resp.status, txt[:500], payload)
-                    return False
-                _LOGGER.debug("SFP reset: OK (%s): %s", resp.status, txt[:300])
-                return True
+            # Resetting is idempotent, so transient failures are safe to retry
+            status, txt = await async_post_with_retry(
+                async_get_clientsession(self.hass), url,
+                json=payload, headers=headers, timeout=BUBBLE_TIMEOUT,
+            )
+            if status == 401 or is_bubble_soft_401(txt):
+                _LOGGER.warning(
+                    "SFP reset: unauthorized (HTTP=%s, soft401=%s). Will try a token refresh.",
+                    status, is_bubble_soft_401(txt),
+                )
+                return _RESET_UNAUTHORIZED
+            if status >= 400:
+                _LOGGER.error("SFP reset: POST %s -> %s %s", url, status, txt[:500])
+                return _RESET_FAILED
+            _LOGGER.debug("SFP reset: OK (%s): %s", status, txt[:300])
+            return _RESET_OK
         except Exception as e:
             _LOGGER.error("SFP reset: request failed: %s", e)
-            return False
+            return _RESET_FAILED
 
     async def async_press(self) -> None:
-        api_base = (self.entry.data.get(CONF_API_BASE) or "").rstrip("/")
-        reset_path = (self.entry.data.get(CONF_RESET_PATH) or DEFAULT_RESET_PATH).strip("/")
-        user_id = self.entry.data.get(CONF_USER_ID)
-        hvac_id = _normalize_hvac(self.entry.data.get(CONF_HVAC_ID))
-
-        if not api_base or not user_id or not hvac_id:
+        url, payload = self._reset_url, self._reset_payload
+        if not url:
             _LOGGER.error("SFP reset: aborted (missing api_base/user_id/hvac_id)")
             return
 
-        url = f"{api_base}/{reset_path}"
-        payload = {"user_id": user_id, "hvac_id": hvac_id}
-
         # 1) ensure token, try once
-        token = await _ensure_valid_token(self.hass, self.entry)
+        await self._auth.ensure_valid()
+        token = self._auth.access_token
         headers = {"Accept": "application/json", "Cache-Control": "no-cache"}
         if token:
             headers["Authorization"] = f"Bearer {token}"
 
         _LOGGER.debug("SFP reset: POST %s payload=%s", url, payload)
-        ok = await self._post_reset(url, payload, headers)
+        result = await self._post_reset(url, payload, headers)
 
         # 2) if unauthorized, refresh token and retry once
-        if not ok:
-            token = await _ensure_valid_token(self.hass, self.entry)  # will refresh if needed
+        if result == _RESET_UNAUTHORIZED:
+            # The cached expiry still says valid; the server disagrees
+            await self._auth.force_refresh()
+            token = self._auth.access_token
             headers = {"Accept": "application/json", "Cache-Control": "no-cache"}
             if token:
                 headers["Authorization"] = f"Bearer {token}"
-            ok = await self._post_reset(url, payload, headers)
+            result = await self._post_reset(url, payload, headers)
 
         # 3) on success, refresh status sensors to reflect the reset
-        if ok:
-            coord = (self.hass.data.get(DOMAIN, {}).get(self.entry.entry_id, {}).get("status_coord"))
-            if coord:
-                await coord.async_request_refresh()
-                async def _later():
-                    try:
-                        await asyncio.sleep(3)
-                        await coord.async_request_refresh()
-                    except Exception:
-                        pass
-                asyncio.create_task(_later())
+        if result == _RESET_OK:
+            await self._followup.async_call()
@@ -1,16 +1,18 @@
 # custom_components/smartfilterpro/config_flow.py
 from __future__ import annotations
 
-import json
 import logging
-from typing import Any, Dict, Iterable, Optional
+import time
+from itertools import chain, repeat
+from typing import Any, Dict, Optional
 
-import aiohttp
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import selector  # for label/value dropdown
+from homeassistant.util.json import json_loads
 
 from .const import (
     DOMAIN,
@@ -25,6 +27,7 @@ from .const import (
     # defaults
     DEFAULT_API_BASE, DEFAULT_LOGIN_PATH, DEFAULT_POST_PATH,
     DEFAULT_RESET_PATH, DEFAULT_STATUS_URL, DEFAULT_REFRESH_PATH,
+    BUBBLE_TIMEOUT,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -41,43 +44,34 @@ LOGIN_KEY_MAP = {
     "hvac_name": ("hvac_name",),                 # list aligned with hvac_id(s)
 }
 
-CHOICE_SKIP = "__SFP_SKIP__"  # sentinel for “skip climate selection”
-
+# alias -> (canonical key, priority); lower priority wins, as with _pick
+_LOGIN_ALIASES = {
+    alias: (canon, rank)
+    for canon, aliases in LOGIN_KEY_MAP.items()
+    for rank, alias in enumerate(aliases)
+}
 
-def _pick(obj: Dict[str, Any], *keys):
-    for k in keys:
-        if k in obj and obj[k] is not None:
-            return obj[k]
-    return None
+CHOICE_SKIP = "__SFP_SKIP__"  # sentinel for “skip climate selection”
 
 
-def _normalize_hvac(val: Any) -> Optional[str]:
-    """Ensure HVAC id is a simple string (handles list or stringified list)."""
-    if val is None:
-        return None
-    if isinstance(val, (list, tuple, set)):
-        for item in val:
-            return str(item)
-        return None
-    s = str(val).strip()
-    if s.startswith("[") and s.endswith("]"):
-        try:
-            js = s.replace("'", '"') if ("'" in s and '"' not in s) else s
-            arr = json.loads(js)
-            if isinstance(arr, Iterable):
-                for item in arr:
-                    return str(item)
-        except Exception:
-            s = s.strip("[]").strip().strip("'").strip('"')
-            return s or None
-    return s or None
+def _pick_login_fields(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve every LOGIN_KEY_MAP field in one pass over the response body."""
+    found: Dict[str, tuple] = {}
+    if not isinstance(body, dict):
+        return found
+    for key, value in body.items():
+        hit = _LOGIN_ALIASES.get(key)
+        if hit is None or value is None:
+            continue
+        canon, rank = hit
+        if canon not in found or rank < found[canon][0]:
+            found[canon] = (rank, value)
+    return {canon: value for canon, (_rank, value) in found.items()}
 
 
 def _climate_entity_ids(hass: HomeAssistant) -> list[str]:
-    try:
-        return sorted(list(hass.states.async_entity_ids("climate")))
-    except Exception:
-        return []
+    # async_entity_ids already returns a fresh list and doesn't raise
+    return sorted(hass.states.async_entity_ids("climate"))
 
 
 # User-facing login schema (simple - just email/password)
@@ -86,6 +80,25 @@ STEP_LOGIN_SCHEMA = vol.Schema({
     vol.Required(CONF_PASSWORD): str,
 })
 
+# Endpoints aren't shown in the UI, so they're normalized once at import
+_ENDPOINTS = {
+    CONF_API_BASE: DEFAULT_API_BASE.rstrip("/"),
+    CONF_LOGIN_PATH: DEFAULT_LOGIN_PATH.strip("/"),
+    CONF_POST_PATH: DEFAULT_POST_PATH.strip("/"),
+    CONF_RESET_PATH: DEFAULT_RESET_PATH.strip("/"),
+    CONF_REFRESH_PATH: DEFAULT_REFRESH_PATH.strip("/"),
+    CONF_STATUS_URL: DEFAULT_STATUS_URL.strip("/"),
+}
+LOGIN_URL = f"{_ENDPOINTS[CONF_API_BASE]}/{_ENDPOINTS[CONF_LOGIN_PATH]}"
+STATUS_FULL_URL = f"{_ENDPOINTS[CONF_API_BASE]}/{_ENDPOINTS[CONF_STATUS_URL]}"
+
+# Kept in the login context for the flow but not written to the entry
+FLOW_ONLY_KEYS = frozenset({CONF_EMAIL, CONF_LOGIN_PATH})
+
+# Fixed schema keys for the dynamic steps; only the option lists vary per flow
+HVAC_FIELD = vol.Required(CONF_HVAC_ID)
+CLIMATE_FIELD = vol.Required(CONF_CLIMATE_ENTITY_ID, default=CHOICE_SKIP)
+
 
 class SmartFilterProConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for SmartFilterPro."""
@@ -96,6 +109,10 @@ class SmartFilterProConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._hvac_options: list[dict] = []         # [{"label": "...", "value": "..."}]
         self._hvac_name_by_id: Dict[str, str] = {}  # {"id": "friendly name"}
         self._pending_entry_data: Dict[str, Any] = {}
+        self._climate_choices: Optional[Dict[str, str]] = None  # cached per flow
+        # Step schemas, built once their options are known
+        self._hvac_schema: Optional[vol.Schema] = None
+        self._climate_schema: Optional[vol.Schema] = None
 
     # ------------- Step 1: Login -------------
     async def async_step_user(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
@@ -107,57 +124,71 @@ class SmartFilterProConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         email = user_input[CONF_EMAIL].strip()
         password = user_input[CONF_PASSWORD]
 
-        # Use defaults for all endpoints (not shown in UI)
-        api_base = DEFAULT_API_BASE.rstrip("/")
-        login_path = DEFAULT_LOGIN_PATH.strip("/")
-        post_path = DEFAULT_POST_PATH.strip("/")
-        reset_path = DEFAULT_RESET_PATH.strip("/")
-        refresh_path = DEFAULT_REFRESH_PATH.strip("/")
-        status_url = DEFAULT_STATUS_URL.strip("/")
-
-        login_url = f"{api_base}/{login_path}"
+        login_url = LOGIN_URL
 
         # Login
         try:
-            async with aiohttp.ClientSession() as s:
-                async with s.post(login_url, json={"email": email, "password": password}, timeout=25) as resp:
+            # HA's shared session: the pooled Bubble connection is reused by
+            # the entry once it is created
+            s = async_get_clientsession(self.hass)
+            async with s.post(
+                login_url, json={"email": email, "password": password}, timeout=BUBBLE_TIMEOUT
+            ) as resp:
+                if resp.status >= 400:
                     txt = await resp.text()
-                    if resp.status >= 400:
-                        _LOGGER.error("Login %s -> %s %s", login_url, resp.status, txt[:500])
-                        errors["base"] = "Cannot connect"
-                        return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
-                    try:
-                        data = json.loads(txt)
-                    except Exception:
-                        _LOGGER.error("Login non-JSON: %s", txt[:500])
-                        errors["base"] = "unknown"
-                        return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
+                    _LOGGER.error("Login %s -> %s %s", login_url, resp.status, txt[:500])
+                    errors["base"] = "Cannot connect"
+                    return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
+                try:
+                    # Parsed from the buffered bytes; text is only decoded to log a failure
+                    data = await resp.json(content_type=None, loads=json_loads)
+                except Exception:
+                    txt = await resp.text()
+                    _LOGGER.error("Login non-JSON: %s", txt[:500])
+                    errors["base"] = "unknown"
+                    return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
         except Exception as e:
             _LOGGER.exception("Login call failed: %s", e)
             errors["base"] = "cannot_connect"
             return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
 
-        body = data.get("response", data) if isinstance(data, dict) else {}
+        # Bubble may or may not wrap the payload in {"response": {...}}
+        body = data if isinstance(data, dict) else {}
+        inner = body.get("response")
+        if isinstance(inner, dict):
+            body = inner
 
-        access_token  = _pick(body, *LOGIN_KEY_MAP["access_token"])
-        refresh_token = _pick(body, *LOGIN_KEY_MAP["refresh_token"])
-        expires_at    = _pick(body, *LOGIN_KEY_MAP["expires_at"])
-        expires_in    = _pick(body, *LOGIN_KEY_MAP["expires_in"])
-        user_id       = _pick(body, *LOGIN_KEY_MAP["user_id"])
+        fields = _pick_login_fields(body)
+        access_token  = fields.get("access_token")
+        refresh_token = fields.get("refresh_token")
+        expires_at    = fields.get("expires_at")
+        expires_in    = fields.get("expires_in")
+        user_id       = fields.get("user_id")
 
-        raw_hvac_id   = _pick(body, *LOGIN_KEY_MAP["hvac_id"])  # may be str or list
-        hvac_ids_alt  = _pick(body, *LOGIN_KEY_MAP["hvac_ids"]) or []
-        hvac_names    = _pick(body, *LOGIN_KEY_MAP["hvac_name"]) or []
+        raw_hvac_id   = fields.get("hvac_id")  # may be str or list
+        hvac_ids_alt  = fields.get("hvac_ids") or []
+        hvac_names    = fields.get("hvac_name") or []
 
         if not access_token or not user_id:
             _LOGGER.error("Login response missing access_token/user_id: %s", body)
             errors["base"] = "unknown"
             return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
 
+        # Stored as int epoch seconds so expiry checks never re-parse it
+        raw_expires_at, expires_at = expires_at, None
+        if raw_expires_at is not None:
+            try:
+                expires_at = int(float(raw_expires_at))
+            except (TypeError, ValueError):
+                _LOGGER.warning("Login returned unparseable expires_at %r", raw_expires_at)
         # Convert expires_in to expires_at if needed
         if expires_at is None and isinstance(expires_in, (int, float)):
-            import time as _t
-            expires_at = int(_t.time()) + int(expires_in)
+            expires_at = int(time.time()) + int(expires_in)
+        elif expires_at is None and raw_expires_at is not None:
+            # A None expiry means long-lived; don't assume that for a bad value
+            _LOGGER.error("Login response has no usable token expiry: %s", body)
+            errors["base"] = "unknown"
+            return self.async_show_form(step_id="user", data_schema=STEP_LOGIN_SCHEMA, errors=errors)
 
         # Normalize thermostats
         ids: list[str] = []
@@ -167,28 +198,22 @@ class SmartFilterProConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ids.append(str(raw_hvac_id))
         ids.extend(str(x) for x in hvac_ids_alt if x)
         # unique (preserve order)
-        seen = set()
-        ids = [x for x in ids if not (x in seen or seen.add(x))]
+        ids = list(dict.fromkeys(ids))
 
-        # Map id -> name from aligned list (if present)
-        self._hvac_name_by_id = {}
-        for idx, _id in enumerate(ids):
-            nm = hvac_names[idx] if idx < len(hvac_names) else None
-            name = (str(nm).strip() if isinstance(nm, (str, int)) else None) or str(_id)
-            self._hvac_name_by_id[str(_id)] = name
+        # Map id -> name from aligned list (if present; may be shorter than ids)
+        self._hvac_name_by_id = {
+            _id: (str(nm).strip() if isinstance(nm, (str, int)) else None) or _id
+            for _id, nm in zip(ids, chain(hvac_names, repeat(None)))
+        }
 
         # Build dropdown options
         self._hvac_options = [{"label": f"{self._hvac_name_by_id[i]} ({i})", "value": i} for i in ids]
+        self._hvac_schema = None  # options changed (e.g. logged in again)
 
         # Stash login context
         self._login_ctx = {
             CONF_EMAIL: email,
-            CONF_API_BASE: api_base,
-            CONF_LOGIN_PATH: login_path,
-            CONF_POST_PATH: post_path,
-            CONF_RESET_PATH: reset_path,
-            CONF_REFRESH_PATH: refresh_path,
-            CONF_STATUS_URL: status_url,
+            **_ENDPOINTS,
             CONF_ACCESS_TOKEN: access_token,
             CONF_REFRESH_TOKEN: refresh_token,
             CONF_EXPIRES_AT: expires_at,
@@ -210,60 +235,54 @@ class SmartFilterProConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     # ------------- Step 2: Choose Bubble thermostat -------------
     async def async_step_hvac(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
         if user_input is None:
-            schema = vol.Schema({
-                vol.Required(CONF_HVAC_ID): selector({
-                    "select": {
-                        "options": self._hvac_options,
-                        "mode": "dropdown"
-                    }
+            if self._hvac_schema is None:
+                self._hvac_schema = vol.Schema({
+                    HVAC_FIELD: selector({
+                        "select": {
+                            "options": self._hvac_options,
+                            "mode": "dropdown"
+                        }
+                    })
                 })
-            })
-            return self.async_show_form(step_id="hvac", data_schema=schema, errors={})
+            return self.async_show_form(step_id="hvac", data_schema=self._hvac_schema, errors={})
 
         hvac_id = str(user_input[CONF_HVAC_ID])
         return await self._resolve_and_prepare(hvac_id)
 
     # ------------- Prepare entry; then optional HA climate selection -------------
     async def _resolve_and_prepare(self, hvac_id: Optional[str]) -> FlowResult:
-        api_base = self._login_ctx[CONF_API_BASE]
-        user_id = self._login_ctx[CONF_USER_ID]
-        status_url = f"{api_base}/{self._login_ctx[CONF_STATUS_URL]}"
         bubble_name = self._hvac_name_by_id.get(str(hvac_id)) if hvac_id else None
 
+        # Login context carries everything the entry needs except the
+        # flow-only keys; the status path is stored as a full URL
         self._pending_entry_data = {
-            CONF_USER_ID: user_id,
+            **{k: v for k, v in self._login_ctx.items() if k not in FLOW_ONLY_KEYS},
             CONF_HVAC_ID: hvac_id,
             CONF_HVAC_UID: hvac_id,
             "hvac_name": bubble_name,                   # <-- keep Bubble-friendly name
-            CONF_API_BASE: api_base,
-            CONF_POST_PATH: self._login_ctx[CONF_POST_PATH],
-            CONF_RESET_PATH: self._login_ctx[CONF_RESET_PATH],
-            CONF_STATUS_URL: status_url,
-            CONF_REFRESH_PATH: self._login_ctx[CONF_REFRESH_PATH],
-            CONF_ACCESS_TOKEN: self._login_ctx.get(CONF_ACCESS_TOKEN),
-            CONF_REFRESH_TOKEN: self._login_ctx.get(CONF_REFRESH_TOKEN),
-            CONF_EXPIRES_AT: self._login_ctx.get(CONF_EXPIRES_AT),
+            CONF_STATUS_URL: STATUS_FULL_URL,
         }
         return await self.async_step_climate()
 
+    def _get_climate_choices(self) -> Dict[str, str]:
+        """Climate entity choices, enumerated once for the lifetime of this flow."""
+        if self._climate_choices is None:
+            # Always include an explicit Skip option so Submit is enabled
+            choices = {CHOICE_SKIP: "Skip (no thermostat)"}
+            for eid in _climate_entity_ids(self.hass):
+                choices[eid] = eid
+            self._climate_choices = choices
+        return self._climate_choices
+
     # ------------- Step 3: Optional HA climate entity (with Skip) -------------
     @callback
     async def async_step_climate(self, user_input: Optional[Dict[str, Any]] = None) -> FlowResult:
-        try:
-            ha_climates = sorted(list(self.hass.states.async_entity_ids("climate")))
-        except Exception:
-            ha_climates = []
-
-        # Always include an explicit Skip option so Submit is enabled
-        choices_dict = {CHOICE_SKIP: "Skip (no thermostat)"}
-        for eid in ha_climates:
-            choices_dict[eid] = eid
-
         if user_input is None:
-            schema = vol.Schema({
-                vol.Required(CONF_CLIMATE_ENTITY_ID, default=CHOICE_SKIP): vol.In(choices_dict)
-            })
-            return self.async_show_form(step_id="climate", data_schema=schema, errors={})
+            if self._climate_schema is None:
+                self._climate_schema = vol.Schema({
+                    CLIMATE_FIELD: vol.In(self._get_climate_choices())
+                })
+            return self.async_show_form(step_id="climate", data_schema=self._climate_schema, errors={})
 
         selection = user_input.get(CONF_CLIMATE_ENTITY_ID)
         data = dict(self._pending_entry_data)
@@ -1,3 +1,5 @@
+from aiohttp import ClientTimeout
+
 DOMAIN = "smartfilterpro"
 
 # Some integrations import these; safe to define
@@ -10,6 +12,56 @@ PLATFORMS = ["sensor", "button"]
 # ==== Railway Core Ingest URL (same for both Hubitat and HA) ====
 CORE_INGEST_URL = "https://core.smartfilterpro.com/ingest/v1/events:batch"
 
+# Dedicated connection pool for Core ingest (keep-alive reuse across telemetry posts)
+CORE_HTTP_LIMIT = 8
+CORE_HTTP_LIMIT_PER_HOST = 4
+CORE_HTTP_KEEPALIVE_SECONDS = 120
+CORE_HTTP_DNS_CACHE_SECONDS = 300
+
+# Request timeouts, built once and shared by every caller; connect is short so
+# a dead host fails fast instead of using up the whole budget
+BUBBLE_TIMEOUT = ClientTimeout(total=25, connect=5, sock_read=20)
+CORE_TIMEOUT = ClientTimeout(total=20, connect=5, sock_connect=5, sock_read=15)
+
+# Cooldown for climate changes that don't cross a cycle/status boundary: the
+# first is handled at once, later ones collapse to the newest state
+STATE_COALESCE_SECONDS = 1.0
+
+# Steady-state telemetry pings are coalesced for this long before posting
+TELEMETRY_DEBOUNCE_SECONDS = 1.5
+# ...and never flushed more often than this, bounding the ping rate for chatty
+# thermostats (cycle boundaries and connectivity changes are not limited)
+TELEMETRY_MIN_INTERVAL_SECONDS = 15
+
+# Upper bound on events per Core ingest request; larger backlogs are split
+TELEMETRY_MAX_BATCH = 25
+# Events held while Core is slow/unreachable; the oldest are dropped past this
+TELEMETRY_MAX_PENDING = 256
+# Events whose POST failed are kept (up to this many) and re-sent on a timer,
+# giving up on an event after this many failed attempts
+TELEMETRY_RETRY_MAX = 100
+TELEMETRY_RETRY_ATTEMPTS = 5
+TELEMETRY_RETRY_INTERVAL_SECONDS = 60
+
+# Renew the Core JWT in the background this long before it would go stale,
+# so telemetry posts never wait on a token round-trip
+CORE_TOKEN_REFRESH_LEAD_SECONDS = 30
+
+# Filter status changes slowly: the status poll starts at this interval and
+# stretches by the same step after every STATUS_STABLE_POLLS identical
+# responses, up to the max; any change drops it back to the base
+STATUS_POLL_MINUTES = 20
+STATUS_POLL_MAX_MINUTES = 60
+STATUS_STABLE_POLLS = 3
+
+# Bubble requests retry 5xx/429 responses and connection errors this many
+# times in total, waiting BACKOFF, 2*BACKOFF, ... seconds between attempts
+HTTP_RETRY_ATTEMPTS = 3
+HTTP_RETRY_BACKOFF_SECONDS = 0.5
+
+# Identical Core POST errors within this window are logged once, then counted
+POST_ERROR_LOG_INTERVAL = 60
+
 # ==== Config entry keys ====
 CONF_USER_ID = "user_id"
 CONF_HVAC_ID = "hvac_id"            # selected HVAC id (we also send in body as hvac_uid)
@@ -35,6 +87,13 @@ CONF_CLIMATE_ENTITY_ID = "climate_entity_id"
 CONF_CORE_TOKEN = "core_token"
 CONF_CORE_TOKEN_EXP = "core_token_exp"  # epoch seconds (UTC)
 
+# Keys rewritten by token refreshes. Everything reads them from the entry at
+# use time, so an update that changes only these doesn't reload the entry.
+TOKEN_KEYS = frozenset({
+    CONF_ACCESS_TOKEN, CONF_REFRESH_TOKEN, CONF_EXPIRES_AT,
+    CONF_CORE_TOKEN, CONF_CORE_TOKEN_EXP,
+})
+
 # ==== Defaults (update base or version when you flip from test→live) ====
 DEFAULT_API_BASE = "https://smartfilterpro.com/version-test"
 DEFAULT_LOGIN_PATH = "/api/1.1/wf/ha_password_login"
@@ -53,3 +112,4 @@ CORE_TOKEN_SKEW_SECONDS = 60
 # Runtime calculation constants
 MAX_RUNTIME_SECONDS = 86400  # 24 hours maximum reasonable runtime
 RUNTIME_PERSIST_WINDOW = 3600  # 1 hour - restore active cycles within this window after restart
+RUNTIME_SAVE_DELAY = 15  # seconds - coalesce runtime state writes into one Store save
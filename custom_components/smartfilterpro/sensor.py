@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-import json
 import logging
-import time
 from datetime import timedelta
-from typing import Optional, Dict, Any, Iterable
+from typing import Optional, Dict, Any
 
 import aiohttp
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.json import json_bytes
 from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator
+from homeassistant.util.json import json_loads
 
 from .const import (
     DOMAIN,
@@ -21,11 +21,16 @@ from .const import (
     CONF_HVAC_ID, CONF_HVAC_UID, CONF_USER_ID,
     CONF_CLIMATE_ENTITY_ID,
     DEFAULT_REFRESH_PATH, TOKEN_SKEW_SECONDS,
+    STATUS_POLL_MINUTES, STATUS_POLL_MAX_MINUTES, STATUS_STABLE_POLLS,
+    BUBBLE_TIMEOUT,
 )
-from .auth import SfpAuth, is_bubble_soft_401
+from .auth import SfpAuth, async_get_auth, is_bubble_soft_401
+from .util import normalize_hvac
 
 _LOGGER = logging.getLogger(__name__)
 
+STATUS_BASE_HEADERS = {"Accept": "application/json", "Cache-Control": "no-cache"}
+
 # Keys matching new Bubble response format
 K_FILTER_HEALTH = "filter_health"
 K_MINUTES_ACTIVE = "minutes_active"
@@ -41,32 +46,44 @@ FALLBACK_KEYS = {
 # Fallback keys for device name
 DEVICE_NAME_KEYS = ("deviceName", "device_name", "thermostat_name", "name")
 
-def _pick(obj: Dict, *keys):
-    for k in keys:
-        if k in obj and obj[k] is not None:
-            return obj[k]
-    return None
-
-
-def _normalize_hvac(val: Any) -> Optional[str]:
-    if val is None:
-        return None
-    if isinstance(val, (list, tuple, set)):
-        for item in val:
-            return str(item)
-        return None
-    s = str(val).strip()
-    if s.startswith("[") and s.endswith("]"):
-        try:
-            js = s.replace("'", '"') if ("'" in s and '"' not in s) else s
-            arr = json.loads(js)
-            if isinstance(arr, Iterable):
-                for item in arr:
-                    return str(item)
-        except Exception:
-            s = s.strip("[]").strip().strip("'").strip('"')
-            return s or None
-    return s or None
+# Every accepted response key -> (field, precedence), so a status body is
+# read in one pass instead of probing each alias per field
+_FIELD_ALIASES: Dict[str, tuple] = {
+    alias: (field, rank)
+    for field, aliases in (*FALLBACK_KEYS.items(), ("device_name", DEVICE_NAME_KEYS))
+    for rank, alias in enumerate(aliases)
+}
+_STATUS_FIELDS = (*FALLBACK_KEYS, "device_name")
+
+
+def _extract_fields(body: Dict) -> Dict[str, Any]:
+    """Pick each field from its highest-precedence non-null alias in body."""
+    out: Dict[str, Any] = dict.fromkeys(_STATUS_FIELDS)
+    ranks: Dict[str, int] = {}
+    for key, val in body.items():
+        hit = _FIELD_ALIASES.get(key)
+        if hit is None or val is None:
+            continue
+        field, rank = hit
+        if rank < ranks.get(field, len(_FIELD_ALIASES)):
+            out[field] = val
+            ranks[field] = rank
+    return out
+
+
+# Value converters picked once per sensor, so native_value doesn't branch
+def _identity(val):
+    return val
+
+
+def _round_1(val):
+    # float()/round() can't raise for an int or float (inf/nan pass through)
+    if isinstance(val, (int, float)):
+        return round(float(val), 1)
+    return val
+
+# Shared stand-in for coordinator.data before the first successful poll
+_NO_DATA: Dict[str, Any] = {}
 
 def _combine_url(api_base: str, maybe_path: str) -> str:
     b = (api_base or "").rstrip("/")
@@ -88,6 +105,16 @@ class SfpStatusCoordinator(DataUpdateCoordinator[dict]):
         self._api_base: str = (entry.data.get(CONF_API_BASE) or "").rstrip("/")
         self._refresh_path: str = (entry.data.get(CONF_REFRESH_PATH) or DEFAULT_REFRESH_PATH).strip("/")
         self._post_path: str = (entry.data.get(CONF_POST_PATH) or "").strip("/")
+        self._hvac_uid: Optional[str] = normalize_hvac(
+            entry.data.get(CONF_HVAC_UID) or entry.data.get(CONF_HVAC_ID)
+        )
+        # Same body on every poll and retry, so it is serialized once
+        self._payload: Optional[bytes] = (
+            json_bytes({"hvac_uid": self._hvac_uid}) if self._hvac_uid else None
+        )
+        self._base_headers: Dict[str, str] = dict(STATUS_BASE_HEADERS)
+        if self._payload is not None:
+            self._base_headers["Content-Type"] = "application/json"
 
         if not self._status_url:
             raise ValueError("SmartFilterPro: missing status_url in config entry")
@@ -99,7 +126,17 @@ class SfpStatusCoordinator(DataUpdateCoordinator[dict]):
         )
 
         self._session: aiohttp.ClientSession = async_get_clientsession(hass)
-        super().__init__(hass, _LOGGER, name=f"{DOMAIN}_status", update_interval=timedelta(minutes=20))
+        self._auth: SfpAuth = async_get_auth(hass, entry)
+        self._stable_polls = 0
+        # Raw body of the last parsed status response
+        self._last_text: Optional[str] = None
+        # Request headers are rebuilt only when the access token changes
+        self._headers_token: Optional[str] = None
+        self._headers: Dict[str, str] = dict(self._base_headers)
+        super().__init__(
+            hass, _LOGGER, name=f"{DOMAIN}_status",
+            update_interval=timedelta(minutes=STATUS_POLL_MINUTES),
+        )
 
     # --- token helpers via SfpAuth ---
     def _access_token(self) -> Optional[str]:
@@ -114,46 +151,69 @@ class SfpStatusCoordinator(DataUpdateCoordinator[dict]):
         return int(v) if v is not None else None
 
     async def _ensure_valid_token(self) -> None:
-        auth = SfpAuth(self.hass, self.entry)
-        await auth.ensure_valid()
-        self.entry = self.hass.config_entries.async_get_entry(self.entry.entry_id)
+        # SfpAuth updates self.entry in place; no need to re-fetch it
+        await self._auth.ensure_valid()
 
     async def _refresh_access_token(self) -> None:
         # Force refresh regardless of skew check
-        auth = SfpAuth(self.hass, self.entry)
-        # simulate forced refresh by temporarily setting expiry
-        if auth.expires_at is not None:
-            new_data = dict(self.entry.data)
-            new_data[CONF_EXPIRES_AT] = int(time.time()) - 1
-            self.hass.config_entries.async_update_entry(self.entry, data=new_data)
-            self.entry = self.hass.config_entries.async_get_entry(self.entry.entry_id)
-        await auth.ensure_valid()
-        self.entry = self.hass.config_entries.async_get_entry(self.entry.entry_id)
+        await self._auth.force_refresh()
+
+    def _headers_for(self, token: Optional[str]) -> Dict[str, str]:
+        if token != self._headers_token:
+            self._headers = dict(self._base_headers)
+            if token:
+                self._headers["Authorization"] = f"Bearer {token}"
+            self._headers_token = token
+        return self._headers
+
+    def _parse_status(self, text: str) -> dict:
+        """Decode a status body; a byte-identical body reuses the last result."""
+        if text == self._last_text and self.data is not None:
+            return self.data
+        data = json_loads(text)
+        # Handle both wrapped {"response": {...}} and unwrapped {...} formats
+        body = data.get("response", data) if isinstance(data, dict) else data
+        if not isinstance(body, dict):
+            raise RuntimeError(f"Unexpected JSON shape: {body!r}")
+        # Pull telemetry values and expose device_name so entities can use
+        # it for device_info
+        result = _extract_fields(body)
+        self._last_text = text
+        return result
+
+    def _track_stability(self, result: dict) -> dict:
+        """Poll less often while Bubble keeps returning the same status."""
+        if result == self.data:
+            self._stable_polls += 1
+        else:
+            self._stable_polls = 0
+        minutes = min(
+            STATUS_POLL_MAX_MINUTES,
+            STATUS_POLL_MINUTES * (1 + self._stable_polls // STATUS_STABLE_POLLS),
+        )
+        if self.update_interval != timedelta(minutes=minutes):
+            _LOGGER.debug("SmartFilterPro status poll interval -> %s min", minutes)
+            self.update_interval = timedelta(minutes=minutes)
+        return result
 
     # --- main poll ---
     async def _async_update_data(self) -> dict:
         await self._ensure_valid_token()
         token = self._access_token()
 
-        raw_hvac = self.entry.data.get(CONF_HVAC_UID) or self.entry.data.get(CONF_HVAC_ID)
-        hvac_uid = _normalize_hvac(raw_hvac)
-
-        headers = {"Accept": "application/json", "Cache-Control": "no-cache"}
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
-        else:
+        headers = self._headers_for(token)
+        if not token:
             _LOGGER.warning("No access token; sending status request without Authorization header.")
 
-        payload: Dict[str, str] = {}
-        if hvac_uid:
-            payload["hvac_uid"] = hvac_uid
-
+        payload = self._payload
         url = self._status_full_url
         _LOGGER.debug("SmartFilterPro status fetch URL: %s", url)
 
         try:
-            async with self._session.post(url, json=(payload or None), headers=headers, timeout=25) as resp:
-                text = await resp.text()
+            async with self._session.post(url, data=payload, headers=headers, timeout=BUBBLE_TIMEOUT) as resp:
+                # Bubble always answers in UTF-8; naming it skips aiohttp's
+                # charset sniffing when the Content-Type doesn't carry one
+                text = await resp.text(encoding="utf-8", errors="replace")
 
                 # Treat true 401s and Bubble soft-401s the same
                 if resp.status == 401 or is_bubble_soft_401(text):
@@ -163,54 +223,25 @@ class SfpStatusCoordinator(DataUpdateCoordinator[dict]):
                     )
                     await self._refresh_access_token()
                     token2 = self._access_token()
-                    headers2 = {"Accept": "application/json", "Cache-Control": "no-cache"}
-                    if token2:
-                        headers2["Authorization"] = f"Bearer {token2}"
-                    async with self._session.post(url, json=(payload or None), headers=headers2, timeout=25) as r2:
-                        t2 = await r2.text()
+                    headers2 = self._headers_for(token2)
+                    async with self._session.post(url, data=payload, headers=headers2, timeout=BUBBLE_TIMEOUT) as r2:
+                        t2 = await r2.text(encoding="utf-8", errors="replace")
                         if r2.status >= 400 or is_bubble_soft_401(t2):
                             raise RuntimeError(f"Status retry POST {url} -> {r2.status} {t2[:500]}")
-                        data = await r2.json()
-                        # Handle both wrapped {"response": {...}} and unwrapped {...} formats
-                        body = data.get("response", data) if isinstance(data, dict) else data
-                        if not isinstance(body, dict):
-                            raise RuntimeError(f"Unexpected JSON shape: {body!r}")
-                        filter_health = _pick(body, *FALLBACK_KEYS[K_FILTER_HEALTH])
-                        minutes_active = _pick(body, *FALLBACK_KEYS[K_MINUTES_ACTIVE])
-                        last_updated = _pick(body, *FALLBACK_KEYS[K_LAST_UPDATED])
-                        device_name = _pick(body, *DEVICE_NAME_KEYS)
-                        return {
-                            K_FILTER_HEALTH: filter_health,
-                            K_MINUTES_ACTIVE: minutes_active,
-                            K_LAST_UPDATED: last_updated,
-                            "device_name": device_name,
-                        }
+                        return self._track_stability(self._parse_status(t2))
 
                 if resp.status >= 400:
                     raise RuntimeError(f"Status POST {url} -> {resp.status} {text[:500]}")
-                data = await resp.json()
+                result = self._parse_status(text)
         except Exception as e:
             _LOGGER.error("SmartFilterPro status fetch failed: %s", e)
+            # A failed poll ends the stable run; recovery is picked up at the
+            # base interval rather than up to an hour later
+            self._stable_polls = 0
+            self.update_interval = timedelta(minutes=STATUS_POLL_MINUTES)
             raise
 
-        # Handle both wrapped {"response": {...}} and unwrapped {...} formats
-        body = data.get("response", data) if isinstance(data, dict) else data
-        if not isinstance(body, dict):
-            raise RuntimeError(f"Unexpected JSON shape: {body!r}")
-
-        # pull values (telemetry + device_name)
-        filter_health = _pick(body, *FALLBACK_KEYS[K_FILTER_HEALTH])
-        minutes_active = _pick(body, *FALLBACK_KEYS[K_MINUTES_ACTIVE])
-        last_updated = _pick(body, *FALLBACK_KEYS[K_LAST_UPDATED])
-        device_name = _pick(body, *DEVICE_NAME_KEYS)
-
-        # Expose device_name so entities can use it for device_info
-        return {
-            K_FILTER_HEALTH: filter_health,
-            K_MINUTES_ACTIVE: minutes_active,
-            K_LAST_UPDATED: last_updated,
-            "device_name": device_name,
-        }
+        return self._track_stability(result)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     coord = SfpStatusCoordinator(hass, entry)
@@ -221,7 +252,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
 
     hass.data.setdefault(DOMAIN, {}).setdefault(entry.entry_id, {})["status_coord"] = coord
 
-    hvac = _normalize_hvac(entry.data.get(CONF_HVAC_UID) or entry.data.get(CONF_HVAC_ID)) or "default"
+    hvac = normalize_hvac(entry.data.get(CONF_HVAC_UID) or entry.data.get(CONF_HVAC_ID)) or "default"
     suffix = f"{entry.entry_id}_{hvac}"
 
     entities = [
@@ -241,7 +272,7 @@ class SfpFieldSensor(CoordinatorEntity[SfpStatusCoordinator], SensorEntity):
         self._attr_name = name
         self._attr_unique_id = unique_id
         self._attr_native_unit_of_measurement = unit
-        self._round_1 = round_1
+        self._convert = _round_1 if round_1 else _identity
 
         # Optional: state_class & device_class
         if field_key == K_FILTER_HEALTH:
@@ -284,10 +315,4 @@ class SfpFieldSensor(CoordinatorEntity[SfpStatusCoordinator], SensorEntity):
 
     @property
     def native_value(self):
-        val = (self.coordinator.data or {}).get(self._key)
-        if self._round_1 and isinstance(val, (int, float)):
-            try:
-                return round(float(val), 1)
-            except Exception:
-                return val
-        return val
+        return self._convert((self.coordinator.data or _NO_DATA).get(self._key))
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from homeassistant.util.json import json_loads
+
+
+def normalize_hvac(val: Any) -> Optional[str]:
+    """Ensure HVAC id is a simple string (handles list or stringified list)."""
+    # Plain string ids are the common case; only bracketed ones need parsing
+    if type(val) is str and "[" not in val:
+        return val.strip() or None
+    if val is None:
+        return None
+    if isinstance(val, (list, tuple, set)):
+        for item in val:
+            return str(item)
+        return None
+    s = str(val).strip()
+    if s.startswith("[") and s.endswith("]"):
+        try:
+            js = s.replace("'", '"') if ("'" in s and '"' not in s) else s
+            arr = json_loads(js)
+        except Exception:
+            s = s.strip("[]").strip().strip("'").strip('"')
+            return s or None
+        # A "[...]" string always decodes to a list; an empty one falls
+        # through and is kept as-is
+        for item in arr:
+            return str(item)
+    return s or None